@@ -0,0 +1,245 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.common import auth, DEFAULT_MAX_CONCURRENT_REQUESTS
+from app.instrumentation import get_tracer
+from app.job_poller import RETRYABLE_STATUS_CODES, retry_after_seconds
+from app.multipart_upload import MultipartFileStream, ProgressCallback
+from app.state import State
+
+# (connect, read) timeouts in seconds for each group of endpoints
+ENDPOINT_TIMEOUTS = {
+    "folders": (10, 60),
+    "dashboards": (10, 60),
+    "content_export": (10, 60),
+    "report_jobs": (10, 120),
+    "apps": (10, 300),
+    "default": (10, 60),
+}
+
+# attempts of a file upload, transient failures are retried after 2, 4, ... seconds
+DEFAULT_UPLOAD_ATTEMPTS = 3
+UPLOAD_RETRY_DELAY = 2
+
+# Sumo Logic allows 4 requests per second and 10 concurrent requests per access key
+DEFAULT_MAX_REQUESTS_PER_SECOND = 4
+MAX_CONCURRENT_REQUESTS_PER_KEY = 10
+
+# attempts of a throttled request, retried after its Retry-After delay or after 1, 2, 4, ... seconds
+DEFAULT_REQUEST_ATTEMPTS = 5
+REQUEST_RETRY_DELAY = 1
+MAX_REQUEST_RETRY_DELAY = 30
+THROTTLED_STATUS_CODES = (429, 503)
+
+# connections kept for the job poller, which polls while the request workers are busy
+JOB_POLLER_CONNECTIONS = 1
+
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "User-Agent": "app-packaging-tool",
+}
+
+
+def connection_pool_size(max_concurrent_requests: int) -> int:
+    """
+    Connections needed by `max_concurrent_requests` threads sending requests while jobs are polled.
+    """
+    return max_concurrent_requests + JOB_POLLER_CONNECTIONS
+
+
+class AccessKeyLimiter:
+    """
+    Keeps the requests of one access key under the API rate limits: at most `max_requests_per_second` requests are
+    started per second and at most `MAX_CONCURRENT_REQUESTS_PER_KEY` are in flight. Used as a context manager
+    around every request.
+    """
+
+    def __init__(self, max_requests_per_second: Optional[float]):
+        self.interval = 1.0 / max_requests_per_second if max_requests_per_second else 0.0
+        self._next_request_at = 0.0
+        self._semaphore = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS_PER_KEY)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        with self._lock:
+            now = time.monotonic()
+            request_at = max(now, self._next_request_at)
+            self._next_request_at = request_at + self.interval
+        time.sleep(request_at - now)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._semaphore.release()
+        return False
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold back all requests of the access key for `seconds`, after the API throttled it.
+        """
+        with self._lock:
+            self._next_request_at = max(self._next_request_at, time.monotonic() + seconds)
+
+
+# (access id, requests per second) -> limiter, shared by all clients of the process
+_access_key_limiters: Dict[Tuple[Optional[str], Optional[float]], AccessKeyLimiter] = {}
+_access_key_limiters_lock = threading.Lock()
+
+
+def access_key_limiter(access_id: Optional[str], max_requests_per_second: Optional[float]) -> AccessKeyLimiter:
+    with _access_key_limiters_lock:
+        key = (access_id, max_requests_per_second)
+        if key not in _access_key_limiters:
+            _access_key_limiters[key] = AccessKeyLimiter(max_requests_per_second)
+        return _access_key_limiters[key]
+
+
+class ApiClient:
+    """
+    HTTP client shared by every call to the Sumo Logic API.
+
+    The client owns a single keep-alive session with a connection pool large enough for the concurrent crawls, so
+    repeated calls to `{deployment}-api.sumologic.net` reuse TLS connections instead of opening a new one per request.
+    Credentials are read from `State` and the session auth is refreshed whenever the user logs in again.
+
+    All clients using the same access key share an `AccessKeyLimiter`, so concurrent crawls, job submissions and
+    polls (also of different apps in a batch) stay under the API rate limits. Throttled requests are retried.
+    """
+
+    def __init__(self, state: State, pool_size: int = connection_pool_size(DEFAULT_MAX_CONCURRENT_REQUESTS),
+                 max_requests_per_second: Optional[float] = DEFAULT_MAX_REQUESTS_PER_SECOND):
+        self.state = state
+        self.pool_size = pool_size
+        self.max_requests_per_second = max_requests_per_second
+        self._session = None
+        self._credentials = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        credentials = (self.state.access_id, self.state.access_key)
+        with self._lock:
+            if self._session is None:
+                self._session = self._create_session()
+            if credentials != self._credentials:
+                self._session.auth = auth(self.state.access_key, self.state.access_id)
+                self._credentials = credentials
+            return self._session
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(DEFAULT_HEADERS)
+        return session
+
+    def request(self, method: str, url: str, endpoint: str = "default",
+                timeout: Optional[Tuple[float, float]] = None, attempts: int = DEFAULT_REQUEST_ATTEMPTS,
+                **kwargs) -> requests.Response:
+        """
+        Send a request through the pooled session. A throttled request (429 or 503) is sent again after the delay
+        of its `Retry-After` header or an exponential backoff, up to `attempts` times in total; the response of the
+        last attempt is returned.
+
+        :param endpoint: name of the endpoint group, used to pick the timeout (see `ENDPOINT_TIMEOUTS`)
+        :param timeout: explicit timeout overriding the endpoint default
+        """
+        if timeout is None:
+            timeout = ENDPOINT_TIMEOUTS.get(endpoint, ENDPOINT_TIMEOUTS["default"])
+        limiter = access_key_limiter(self.state.access_id, self.max_requests_per_second)
+        for attempt in range(1, attempts + 1):
+            with limiter:
+                response = self._send(method, url, endpoint, timeout, **kwargs)
+            if response.status_code not in THROTTLED_STATUS_CODES or attempt == attempts:
+                return response
+            delay = retry_after_seconds(response)
+            if delay is None:
+                delay = min(REQUEST_RETRY_DELAY * 2 ** (attempt - 1), MAX_REQUEST_RETRY_DELAY)
+            response.close()
+            print(f"{method} {urlsplit(url).path} was throttled with status code {response.status_code}, "
+                  f"retrying in {delay:.1f}s")
+            # the other requests of the access key wait as well
+            limiter.pause(delay)
+
+    def _send(self, method: str, url: str, endpoint: str, timeout: Tuple[float, float],
+              **kwargs) -> requests.Response:
+        tracer = get_tracer()
+        if not tracer.enabled:
+            return self.session.request(method, url, timeout=timeout, **kwargs)
+
+        started_at = time.perf_counter()
+        try:
+            response = self.session.request(method, url, timeout=timeout, **kwargs)
+        except Exception as e:
+            tracer.record_http(endpoint, method, urlsplit(url).path, started_at, time.perf_counter() - started_at,
+                               None, 0, 0, error=type(e).__name__)
+            raise
+        # streamed responses are timed until their headers arrived, their body is read by the caller
+        if kwargs.get("stream"):
+            bytes_received = int(response.headers.get("Content-Length") or 0)
+        else:
+            bytes_received = len(response.content)
+        tracer.record_http(endpoint, method, urlsplit(url).path, started_at, time.perf_counter() - started_at,
+                           response.status_code, self.body_size(response.request.body), bytes_received)
+        return response
+
+    @staticmethod
+    def body_size(body) -> int:
+        if body is None:
+            return 0
+        try:
+            return len(body)
+        except TypeError:
+            return 0
+
+    def get(self, url: str, endpoint: str = "default", **kwargs) -> requests.Response:
+        return self.request("GET", url, endpoint, **kwargs)
+
+    def post(self, url: str, endpoint: str = "default", **kwargs) -> requests.Response:
+        return self.request("POST", url, endpoint, **kwargs)
+
+    def put(self, url: str, endpoint: str = "default", **kwargs) -> requests.Response:
+        return self.request("PUT", url, endpoint, **kwargs)
+
+    def delete(self, url: str, endpoint: str = "default", **kwargs) -> requests.Response:
+        return self.request("DELETE", url, endpoint, **kwargs)
+
+    def upload_file(self, method: str, url: str, path: str, endpoint: str = "default", field_name: str = "file",
+                    progress: Optional[ProgressCallback] = None, attempts: int = DEFAULT_UPLOAD_ATTEMPTS,
+                    cancel_event: Optional[threading.Event] = None) -> requests.Response:
+        """
+        Send the file at `path` as a multipart/form-data request, streaming it from disk instead of building the
+        body in memory. Connection errors, timeouts and retryable status codes are retried up to `attempts` times
+        in total; the response of the last attempt is returned.
+
+        :param progress: called with the bytes sent so far and the size of the body, restarts with every attempt
+        :param cancel_event: aborts the upload with `OperationCancelled` between two chunks once it is set
+        """
+        body = MultipartFileStream(path, field_name=field_name, progress=progress, cancel_event=cancel_event)
+        for attempt in range(1, attempts + 1):
+            try:
+                response = self.request(method, url, endpoint, data=body, attempts=1,
+                                        headers={"Content-Type": body.content_type})
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt == attempts:
+                    return response
+                reason = f"status code {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == attempts:
+                    raise
+                reason = str(e)
+            delay = UPLOAD_RETRY_DELAY ** attempt
+            print(f"Upload of {path} failed ({reason}), retrying in {delay}s")
+            time.sleep(delay)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+                self._credentials = None
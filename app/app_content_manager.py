@@ -1,471 +1,695 @@
+import functools
 import json
-import subprocess
-import textwrap
+import tempfile
+import threading
 import traceback
-from typing import Dict, List
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Set
 
-from PIL import Image
+from PIL import Image, ImageChops
 
+from app.api_client import ApiClient, connection_pool_size
 from app.common import *
+from app.content_cache import ContentCache
+from app.content_snapshot import ContentSnapshot, content_version
+from app.folder_index import FolderIndex
+from app.hcl_writer import HclWriter, LazyFile, StagedFiles, hcl_bool
+from app.import_state import ImportState
+from app.instrumentation import get_tracer
+from app.manifest_writer import ManifestMediaWriter
+from app.process_runner import ProcessRunner
+from app.resource_registry import ResourceRegistry
 from app.state import State
 
+DASHBOARD_RESOURCE_PATTERN = re.compile(r'^resource "sumologic_dashboard" "[^"]*-([a-zA-Z0-9]+)" {')
+RESOURCE_HEADER_PATTERN = re.compile(r'^resource "([^"]+)" "([^"]+)" {')
+# rewrites of terraformer's dashboard resources
+FOLDER_ID_PATTERN = re.compile(r'(folder_id\s*=\s*)(")([0-9A-Za-z]+)(")')
+TERRAFORMER_NAME_PREFIX_PATTERN = re.compile(r'tfer--[a-zA-Z0-9-]*-_')
+TERRAFORMER_NAME_ID_PATTERN = re.compile(r'-[a-zA-Z0-9]*(?=" {)')
+NEW_TITLE_SUFFIX = " - New"
+# dashboard ids never change, so the index entries of the content cache have a fixed version
+DASHBOARD_INDEX_VERSION = "index"
+
+# background color for dark themed screenshots
+DARK_THEME_BACKGROUND_COLOR = (16, 24, 39, 255)
+
 
 class AppContentManager:
-    def __init__(self, state: State, terraformer_path: str):
+    def __init__(self, state: State, terraformer_path: str, api_client: Optional[ApiClient] = None,
+                 max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+                 screenshot_workers: Optional[int] = None, content_cache: Optional[ContentCache] = None,
+                 terraformer_shard_size: int = DEFAULT_TERRAFORMER_SHARD_SIZE,
+                 terraformer_workers: Optional[int] = None, terraformer_timeout: float = DEFAULT_TERRAFORMER_TIMEOUT,
+                 process_runner: Optional[ProcessRunner] = None, cancel_event: Optional[threading.Event] = None):
         self.state = state
         self.terraformer_path = terraformer_path
-
-    def import_content(self, app_folder_id, local_dest_path):
-        folders_dict, content_dict = self.get_app_content_with_folders(app_folder_id)
-        personal_folder_id = self.get_personal_folder()["id"]
-
-        folders_tf = self.generate_folders_tf(folders_dict, app_folder_id, personal_folder_id)
-        folders_tf_text = "".join(folders_tf.values())
-
-        variables_tf_text = self.create_static_variables_tf()
-        variables_tf_text += self.generate_variables_tf(folders_dict, app_folder_id)
-
-        dashboard_content = self.filter_dashboards(content_dict)
-        dashboard_content_ids = [dashboard["id"] for dashboard in dashboard_content]
-        dashboards = self.get_dashboards(dashboard_content_ids)
-        dashboard_ids = [dashboard["id"] for dashboard in dashboards]
-
-        searches_tf_text = self.terraformize_saved_searches(folders_dict)
-
-        output_path = APP_PACKAGE_WORK_DIR
-        self.terraformize_dashboards(dashboard_ids, local_dest_path, output_path, folders_dict, app_folder_id)
-
-        folders_tf_path = os.path.join(local_dest_path, "resources", "folders.tf")
-        log_searches_tf_path = os.path.join(local_dest_path, "resources", "log-searches.tf")
-        dashboards_tf_path = os.path.join(local_dest_path, "resources", "dashboards.tf")
-        variables_tf_path = os.path.join(local_dest_path, "resources", "variables.tf")
-        output_path_tf_path = os.path.join(local_dest_path, "resources", "output.tf")
-
-        if folders_tf_text.strip():
-            with open(folders_tf_path, 'w', encoding='utf-8') as file:
-                file.write(folders_tf_text)
-
-        if variables_tf_text.strip():
-            with open(variables_tf_path, 'w', encoding='utf-8') as file:
-                file.write(variables_tf_text)
-
-        if searches_tf_text.strip():
-            with open(log_searches_tf_path, 'w', encoding='utf-8') as file:
-                file.write(searches_tf_text)
-
-        output_tf_text = self.generate_output_tf(dashboards_tf_path, folders_tf_path, log_searches_tf_path)
-
-        if output_tf_text.strip():
-            with open(output_path_tf_path, 'w', encoding='utf-8') as file:
-                file.write(output_tf_text)
-
-        self.download_screenshots(app_folder_id)
-
-    def filter_dashboards(self, content_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        return [item for item in content_list if item['itemType'] == 'Dashboard']
+        self.api_client = api_client or ApiClient(state, connection_pool_size(max_concurrent_requests))
+        self.content_cache = content_cache or ContentCache()
+        self.max_concurrent_requests = max_concurrent_requests
+        # number of screenshots cropped in parallel, defaults to the number of CPUs
+        self.screenshot_workers = screenshot_workers or os.cpu_count() or 1
+        self.terraformer_shard_size = terraformer_shard_size
+        # number of terraformer processes run in parallel, defaults to the number of CPUs
+        self.terraformer_workers = terraformer_workers or os.cpu_count() or 1
+        self.terraformer_timeout = terraformer_timeout
+        self.process_runner = process_runner or ProcessRunner()
+        # setting this event cancels the running import: job polling stops and terraformer processes are terminated
+        self.cancel_event = cancel_event or threading.Event()
+        # deployment -> {dashboard content id -> dashboard id}, filled by every dashboard lookup and backed by the
+        # content cache, so other processes can fetch the same dashboards by id
+        self.dashboard_index: Dict[str, Dict[str, str]] = {}
+
+    def import_content(self, app_folder_id, local_dest_path, incremental: bool = False):
+        """
+        Import the content of `app_folder_id` into the app package at `local_dest_path`.
+
+        Every import records what it produced in the app's import state. With `incremental`, saved searches,
+        dashboards and screenshots of content items whose version didn't change since the previous import of the
+        same folder are reused, and only added or modified items are exported, terraformized and screenshotted.
+        """
+        tracer = get_tracer()
+        snapshot = self.create_content_snapshot(app_folder_id)
+        folders_dict = snapshot.folders
+
+        state_path = import_state_path(self.state.app_work_name)
+        previous_import = ImportState.load(state_path) if incremental else None
+        if previous_import is not None and not previous_import.matches(app_folder_id, self.state.deployment):
+            previous_import = None
+        current_import = ImportState(app_folder_id, self.state.deployment)
+
+        resources_path = os.path.join(local_dest_path, "resources")
+        folders_tf_path = os.path.join(resources_path, "folders.tf")
+        log_searches_tf_path = os.path.join(resources_path, "log-searches.tf")
+        dashboards_tf_path = os.path.join(resources_path, "dashboards.tf")
+        variables_tf_path = os.path.join(resources_path, "variables.tf")
+        output_path_tf_path = os.path.join(resources_path, "output.tf")
+
+        os.makedirs(resources_path, exist_ok=True)
+        # the resource files are only replaced once every stage succeeded
+        with StagedFiles((folders_tf_path, log_searches_tf_path, dashboards_tf_path, variables_tf_path,
+                          output_path_tf_path)) as staged:
+            # every generated resource is registered, output.tf lists exactly what was written
+            registry = ResourceRegistry()
+
+            with tracer.span("folders_tf"):
+                with LazyFile(staged.path(folders_tf_path)) as file:
+                    self.generate_folders_tf(HclWriter(file, registry), folders_dict, snapshot.folder_index)
+
+                with LazyFile(staged.path(variables_tf_path)) as file:
+                    writer = HclWriter(file)
+                    self.create_static_variables_tf(writer)
+                    self.generate_variables_tf(writer, folders_dict, snapshot.folder_index)
+
+            self.check_cancelled()
+            search_jsons = previous_import.unchanged_search_jsons(snapshot) if previous_import else {}
+            with tracer.span("saved_searches", reused=len(search_jsons)), \
+                    LazyFile(staged.path(log_searches_tf_path)) as file:
+                self.terraformize_saved_searches(HclWriter(file, registry), snapshot, search_jsons)
+            current_import.record_searches(snapshot, search_jsons)
+
+            self.check_cancelled()
+            output_path = APP_PACKAGE_WORK_DIR
+            dashboard_blocks = previous_import.unchanged_dashboard_blocks(snapshot) if previous_import else {}
+            changed_dashboard_ids = [dashboard_id for dashboard_id in snapshot.dashboard_ids
+                                     if dashboard_id not in dashboard_blocks]
+            with tracer.span("terraformer", dashboards=len(changed_dashboard_ids)):
+                converted_blocks = self.terraformize_dashboards(snapshot, changed_dashboard_ids, output_path)
+            print(f"Terraformized {len(converted_blocks)} of {len(changed_dashboard_ids)} changed dashboards, "
+                  f"reused {len(dashboard_blocks)} of {len(snapshot.dashboard_ids)}")
+            if changed_dashboard_ids and not converted_blocks:
+                # leaves the previous resource files in place instead of replacing them without any dashboards
+                raise Exception(f"Terraformer converted none of the {len(changed_dashboard_ids)} dashboards, "
+                                f"the import was stopped")
+            dashboard_blocks.update(converted_blocks)
+
+            with tracer.span("dashboards_tf"):
+                if dashboard_blocks:
+                    skipped_ids = self.write_dashboards_tf(
+                        [(dashboard_id, dashboard_blocks[dashboard_id]) for dashboard_id in snapshot.dashboard_ids
+                         if dashboard_id in dashboard_blocks],
+                        staged.path(dashboards_tf_path), snapshot.folder_index, registry)
+                    # skipped dashboards are imported again next time
+                    for dashboard_id in skipped_ids:
+                        del dashboard_blocks[dashboard_id]
+
+                self.check_cancelled()
+                with LazyFile(staged.path(output_path_tf_path)) as file:
+                    self.generate_output_tf(HclWriter(file), registry)
+
+            screenshots = previous_import.unchanged_screenshots(snapshot) if previous_import else {}
+            changed_dashboards = [dashboard for dashboard in snapshot.dashboards
+                                  if dashboard["contentId"] not in screenshots]
+            # screenshots of modified and deleted dashboards are replaced
+            stale_screenshots = {}
+            if previous_import:
+                stale_screenshots = {content_id: path for content_id, path in previous_import.screenshots_of(
+                    previous_import.dashboards).items() if content_id not in screenshots}
+            with tracer.span("screenshots", dashboards=len(changed_dashboards)):
+                screenshots.update(self.download_screenshots(snapshot, changed_dashboards, stale_screenshots))
+            # a dashboard whose new screenshot failed keeps its previous one until the next import replaces it
+            outdated_screenshots = {dashboard["contentId"]: stale_screenshots[dashboard["contentId"]]
+                                    for dashboard in changed_dashboards
+                                    if dashboard["contentId"] not in screenshots
+                                    and dashboard["contentId"] in stale_screenshots}
+            screenshots.update(outdated_screenshots)
+
+            current_import.record_dashboards(snapshot, dashboard_blocks, screenshots, outdated_screenshots)
+            # a cancelled import is incomplete and mustn't be reused by the next incremental import
+            self.check_cancelled()
+            staged.commit()
+        current_import.save(state_path)
+
+    def check_cancelled(self) -> None:
+        if self.cancel_event.is_set():
+            raise OperationCancelled("Import cancelled")
+
+    def create_content_snapshot(self, app_folder_id: str) -> ContentSnapshot:
+        tracer = get_tracer()
+        with tracer.span("folder_crawl"):
+            folders, content = self.get_app_content_with_folders(app_folder_id)
+        dashboard_content = ContentSnapshot.filter_dashboards(content)
+        dashboard_versions = {dashboard["id"]: content_version(dashboard) for dashboard in dashboard_content}
+        with tracer.span("dashboards", dashboards=len(dashboard_versions)):
+            dashboards = self.get_dashboards(list(dashboard_versions), dashboard_versions)
+        return ContentSnapshot(app_folder_id, folders, content, dashboards)
+
+    def cache_namespace(self, name: str) -> str:
+        return f"{self.state.deployment}-{name}"
 
     def get_folder(self, folder_id) -> Dict[str, Any]:
-        endpoint = get_folder_url(self.state.deployment, folder_id)
-        response = requests.get(
-            url=endpoint,
-            auth=auth(self.state.access_key, self.state.access_id),
-        )
+        url = get_folder_url(self.state.deployment, folder_id)
+        response = self.api_client.get(url, endpoint="folders")
 
         if response.status_code != 200:
             raise Exception(f"Failed to get folder {folder_id}. Status code {response.status_code}: {response.text}")
 
         return json.loads(response.content)
 
-    def get_personal_folder(self) -> Dict[str, Any]:
-        return self.get_folder("personal")
-
     def get_app_content_with_folders(self, folder_id: str):
+        """
+        Crawl the folder tree rooted at `folder_id` breadth-first.
+
+        All folders on the same level are fetched concurrently (at most `max_concurrent_requests` at a time), so the
+        number of sequential round trips equals the depth of the tree. The result is assembled in the same
+        depth-first order a recursive crawl would produce.
+        """
+        fetched_folders = {}
+        level = [folder_id]
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+            while level:
+                next_level = []
+                for requested_id, folder in zip(level, executor.map(self.get_folder, level)):
+                    fetched_folders[requested_id] = folder
+                    if folder["itemType"] != "Folder":
+                        continue
+                    for child in folder.get("children") or []:
+                        if child["itemType"] == "Folder" and child["id"] not in fetched_folders:
+                            next_level.append(child["id"])
+                # the same folder must not be requested twice
+                level = list(dict.fromkeys(next_level))
+
         folders = {}
         content = []
-        folder = self.get_folder(folder_id)
-        if folder["itemType"] == "Folder":
-            folders[folder["id"]] = folder
-            if "children" in folder:
-                for child in folder["children"]:
+
+        def collect(current_folder_id):
+            folder = fetched_folders[current_folder_id]
+            if folder["itemType"] == "Folder":
+                folders[folder["id"]] = folder
+                for child in folder.get("children") or []:
                     if child["itemType"] == "Folder":
-                        child_content = self.get_app_content_with_folders(child["id"])
-                        folders.update(child_content[0])
-                        content.extend(child_content[1])
+                        collect(child["id"])
                     else:
                         content.append(child)
-        return [folders, content]
 
-    def get_dashboards(self, dashboard_content_ids):
-        def get_paginated_dashboards(url, headers, next_token=None):
-            params = {'token': next_token} if next_token else {}
-            response = requests.get(
-                url, headers=headers, auth=auth(self.state.access_key, self.state.access_id), params=params)
+        collect(folder_id)
+        return [folders, content]
 
-            if response.status_code != 200:
-                raise Exception(f"Failed to fetch dashboards with status code {response.status_code}: {response.text}")
+    def get_dashboard(self, dashboard_id: str) -> Optional[Dict[str, Any]]:
+        url = get_dashboard_url(self.state.deployment, dashboard_id)
+        response = self.api_client.get(url, endpoint="dashboards")
 
-            return response.json()
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise Exception(f"Failed to get dashboard {dashboard_id}."
+                            f" Status code {response.status_code}: {response.text}")
 
-        url = get_dashboards_url(self.state.deployment)
-        headers = {'Content-Type': 'application/json'}
-        next_token = None
-        all_dashboards = []
-        expected_dashboard_count = len(dashboard_content_ids)
-        while len(all_dashboards) < expected_dashboard_count:
-            response_json = get_paginated_dashboards(url, headers, next_token)
-            new_dashboards = [dashboard for dashboard in response_json['dashboards'] if
-                              dashboard["contentId"] in dashboard_content_ids]
-            all_dashboards.extend(new_dashboards)
-            if response_json["next"] is not None:
-                next_token = response_json["next"]
-            else:
-                break
+        return response.json()
 
-        return all_dashboards
+    def get_dashboards(self, dashboard_content_ids: List[str],
+                       versions: Optional[Dict[str, Optional[str]]] = None) -> List[Dict[str, Any]]:
+        """
+        Resolve the dashboards behind the given dashboard content ids, in the order of `dashboard_content_ids`.
+
+        Cached dashboards are not requested at all. Content ids whose dashboard id is already in the index are
+        fetched directly by id, in parallel. Only the remaining ones fall back to paginating through all dashboards
+        of the account, see `scan_dashboards`.
+        """
+        versions = versions or {}
+        cache_namespace = self.cache_namespace("dashboards")
+        index_namespace = self.cache_namespace("dashboard_ids")
+        index = self.dashboard_index.setdefault(self.state.deployment, {})
+        wanted_content_ids = list(dict.fromkeys(dashboard_content_ids))
+        dashboards_by_content_id = {}
+        persisted_content_ids = set()
+
+        for content_id in wanted_content_ids:
+            dashboard = self.content_cache.get_json(cache_namespace, content_id, versions.get(content_id))
+            if dashboard is not None:
+                dashboards_by_content_id[content_id] = dashboard
+                continue
+            dashboard_id = self.content_cache.get_json(index_namespace, content_id, DASHBOARD_INDEX_VERSION)
+            if dashboard_id:
+                index.setdefault(content_id, dashboard_id)
+                persisted_content_ids.add(content_id)
+        cached_content_ids = set(dashboards_by_content_id)
+
+        indexed_content_ids = [content_id for content_id in wanted_content_ids
+                               if content_id in index and content_id not in cached_content_ids]
+        if indexed_content_ids:
+            with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+                dashboards = executor.map(lambda content_id: self.get_dashboard(index[content_id]), indexed_content_ids)
+                for content_id, dashboard in zip(indexed_content_ids, dashboards):
+                    if dashboard is not None and dashboard["contentId"] == content_id:
+                        dashboards_by_content_id[content_id] = dashboard
+                    else:
+                        # the dashboard was deleted or replaced since it was indexed
+                        del index[content_id]
 
-    def generate_variables_tf(self, folders: Dict[str, Dict[str, str]], app_folder_id) -> str:
-        variables_text = ""
+        missing_content_ids = {content_id for content_id in wanted_content_ids
+                               if content_id not in dashboards_by_content_id}
+        if missing_content_ids:
+            dashboards_by_content_id.update(self.scan_dashboards(missing_content_ids, index))
 
-        for _, folder in folders.items():
-            if folder["id"] == app_folder_id:
+        for content_id, dashboard in dashboards_by_content_id.items():
+            if content_id in cached_content_ids:
                 continue
-            folder_name = slugify(folder["name"], "_")
-            variables_text += f'variable "{folder_name}_folder_name" {{\n'
-            variables_text += '  type        = string\n'
-            variables_text += f'  description = "{folder_name} folder name"\n'
-            variables_text += f'  default     = "{folder["name"]}"\n'
-            variables_text += '}\n\n'
-
-            variables_text += f'variable "{folder_name}_folder_description" {{\n'
-            variables_text += '  type        = string\n'
-            variables_text += f'  description = "{folder_name} folder description"\n'
-            variables_text += f'  default     = "{folder["description"]}"\n'
-            variables_text += '}\n\n'
-
-        return variables_text
-
-    def create_static_variables_tf(self) -> str:
-        content = '''
-        variable "integration_root_dir" {
-            type        = string
-            description = "The folder in which app should be installed."
-            default     = ""
-        }
+            self.content_cache.put_json(cache_namespace, content_id, versions.get(content_id), dashboard)
+            if content_id not in persisted_content_ids or content_id in missing_content_ids:
+                self.content_cache.put_json(index_namespace, content_id, DASHBOARD_INDEX_VERSION, dashboard["id"])
 
-        variable "integration_name" {
-            type        = string
-            description = "The name of the integration"
-            default     = ""
-        }
+        return [dashboards_by_content_id[content_id] for content_id in wanted_content_ids
+                if content_id in dashboards_by_content_id]
 
-        variable "integration_description" {
-            type        = string
-            description = "The description of the integration"
-            default     = ""
-        }
-        '''
+    def scan_dashboards(self, dashboard_content_ids: Set[str], index: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Page through `/v2/dashboards/` until all `dashboard_content_ids` are found or there are no more pages.
+
+        Every dashboard seen on the way is added to `index`, so later lookups can fetch it by id instead.
+        """
+        url = get_dashboards_url(self.state.deployment)
+        remaining = set(dashboard_content_ids)
+        found = {}
+        next_token = None
+        while remaining:
+            params = {'token': next_token} if next_token else {}
+            response = self.api_client.get(url, endpoint="dashboards", params=params)
+
+            if response.status_code != 200:
+                raise Exception(f"Failed to fetch dashboards with status code {response.status_code}: {response.text}")
 
-        if content.startswith("\n"):
-            content = content[1:]
+            response_json = response.json()
+            for dashboard in response_json['dashboards']:
+                index[dashboard["contentId"]] = dashboard["id"]
+                if dashboard["contentId"] in remaining:
+                    found[dashboard["contentId"]] = dashboard
+                    remaining.discard(dashboard["contentId"])
 
-        return textwrap.dedent(content)
+            next_token = response_json.get("next")
+            if next_token is None:
+                break
 
-    def generate_folders_tf(self, folders: Dict[str, Dict[str, str]], root_folder_id: str,
-                            root_parent_folder_id: str) -> Dict[str, str]:
-        folders_tf = dict()
+        return found
 
+    def generate_variables_tf(self, writer: HclWriter, folders: Dict[str, Dict[str, str]],
+                              folder_index: FolderIndex) -> None:
         for folder_id, folder in folders.items():
-            folder_text = ""
-            folder_name = slugify(folder["name"], "_")
-            folder_var_name = f'var.{folder_name}_folder_name'
-            folder_var_desc = f'var.{folder_name}_folder_description'
-            # folders in the root folder
-            if folder["parentId"] == root_folder_id:
-                parent_id = 'sumologic_folder.integration_folder.id'
-            # root folder - parent is personal folder
-            elif folder["parentId"] == root_parent_folder_id:
+            if folder_index.is_root(folder_id):
+                continue
+            folder_name = folder_index.name(folder_id)
+            with writer.block("variable", f"{folder_name}_folder_name"):
+                writer.attribute("type", "string")
+                writer.string("description", f"{folder_name} folder name")
+                writer.string("default", folder["name"])
+            writer.blank_line()
+
+            with writer.block("variable", f"{folder_name}_folder_description"):
+                writer.attribute("type", "string")
+                writer.string("description", f"{folder_name} folder description")
+                writer.string("default", folder["description"])
+            writer.blank_line()
+
+    def create_static_variables_tf(self, writer: HclWriter) -> None:
+        static_variables = [
+            ("integration_root_dir", "The folder in which app should be installed."),
+            ("integration_name", "The name of the integration"),
+            ("integration_description", "The description of the integration"),
+        ]
+        for variable_name, description in static_variables:
+            with writer.block("variable", variable_name):
+                writer.attribute("type", "string")
+                writer.string("description", description)
+                writer.string("default", "")
+            writer.blank_line()
+
+    def generate_folders_tf(self, writer: HclWriter, folders: Dict[str, Dict[str, str]],
+                            folder_index: FolderIndex) -> None:
+        for folder_id, folder in folders.items():
+            # root folder - installed into the folder chosen by the user
+            if folder_index.is_root(folder_id):
                 parent_id = "var.integration_root_dir"
-                folder_name = "integration"
                 folder_var_name = 'var.integration_name'
                 folder_var_desc = 'var.integration_description'
-            # child folders of the folders in app folder
             else:
-                parent_id = f'sumologic_folder.{folders[folder["parentId"]]["name"]}_folder.id'
-
-            folder_text += f'resource "sumologic_folder" "{folder_name}_folder" {{\n'
-            folder_text += f'  name        = {folder_var_name}\n'
-            folder_text += f'  description = {folder_var_desc}\n'
-            folder_text += f'  parent_id   = {parent_id}\n'
-            folder_text += '}\n\n'
-
-            folders_tf[folder_id] = folder_text
-
-        return folders_tf
-
-    def terraformize_saved_searches(self, folders: Dict[str, Dict[str, Any]]) -> str:
-        searches_tf = ""
-        for folder in folders.values():
-            if folder['children']:
-                for child in folder['children']:
-                    if child['itemType'] == "Search":
-                        search_json = self.get_saved_search_json(child['id'])
-                        searches_tf += self.json_to_terraform_resource(search_json, slugify(folder["name"], "_"))
-                        searches_tf += "\n"
-
-        return searches_tf
-
-    def get_saved_search_json(self, search_content_id):
+                parent_id = folder_index.reference(folder["parentId"])
+                folder_var_name = f'var.{folder_index.name(folder_id)}_folder_name'
+                folder_var_desc = f'var.{folder_index.name(folder_id)}_folder_description'
+
+            with writer.block("resource", "sumologic_folder", folder_index.resource_name(folder_id)):
+                writer.attribute("name", folder_var_name)
+                writer.attribute("description", folder_var_desc)
+                writer.attribute("parent_id", parent_id)
+            writer.blank_line()
+
+    def terraformize_saved_searches(self, writer: HclWriter, snapshot: ContentSnapshot,
+                                    search_jsons: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """
+        Write the log-searches.tf resources of all saved searches in `snapshot`.
+
+        :param search_jsons: already exported searches keyed by content id, the missing ones are exported and added
+        """
+        saved_searches = snapshot.saved_searches
+        if search_jsons is None:
+            search_jsons = {}
+        search_jsons.update(self.export_saved_searches(
+            [child['id'] for _, child in saved_searches if child['id'] not in search_jsons], snapshot.versions))
+
+        # resources are written in folder order, regardless of the order in which the exports finished
+        for folder, child in saved_searches:
+            self.json_to_terraform_resource(writer, search_jsons[child['id']],
+                                            snapshot.folder_index.reference(folder["id"]))
+            writer.blank_line()
+
+    def export_saved_searches(self, search_content_ids: List[str],
+                              versions: Optional[Dict[str, Optional[str]]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Export many saved searches at once.
+
+        Cached searches are not exported again. All other export jobs are submitted up front and tracked together
+        by a single `JobPoller`; the result of each job is downloaded as soon as it finishes. Every export takes at
+        least three requests, so with many searches the stage is bounded by the API rate limit, not by how long the
+        jobs take. Returns the exported JSON keyed by the search content id.
+        """
+        versions = versions or {}
+        cache_namespace = self.cache_namespace("searches")
+        search_jsons = {}
+        for content_id in dict.fromkeys(search_content_ids):
+            search_json = self.content_cache.get_json(cache_namespace, content_id, versions.get(content_id))
+            if search_json is not None:
+                search_jsons[content_id] = search_json
+
+        search_content_ids = [content_id for content_id in dict.fromkeys(search_content_ids)
+                              if content_id not in search_jsons]
+        if not search_content_ids:
+            return search_jsons
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+            job_ids = executor.map(self.start_saved_search_export, search_content_ids)
+            jobs = [self.saved_search_export_job(content_id, job_id)
+                    for content_id, job_id in zip(search_content_ids, job_ids)]
+
+            futures = []
+            for job in JobPoller(cancel_event=self.cancel_event).as_completed(jobs):
+                self.check_saved_search_export_job(job)
+                futures.append(executor.submit(self.get_saved_search_export_result, *job.key))
+
+            for future in as_completed(futures):
+                search_content_id, search_json = future.result()
+                search_jsons[search_content_id] = search_json
+                self.content_cache.put_json(cache_namespace, search_content_id, versions.get(search_content_id),
+                                            search_json)
+
+        return search_jsons
+
+    def start_saved_search_export(self, search_content_id: str) -> str:
         url = export_content_url(self.state.deployment, search_content_id)
 
-        response = requests.post(
-            url=url,
-            auth=auth(self.state.access_key, self.state.access_id),
-        )
+        response = self.api_client.post(url, endpoint="content_export")
 
         if response.status_code != 200:
             raise Exception(f"Failed to create export saved search job for {search_content_id}."
                             f" Status code {response.status_code}: {response.text}")
 
-        job_id = json.loads(response.content)['id']
-
-        # Wait for the job to complete or for 30 seconds to elapse
-        max_wait_time = 30
-        start_time = time.time()
-        while True:
-            if time.time() - start_time > max_wait_time:
-                # Time limit exceeded
-                raise Exception(f"Exporting content id={search_content_id} timed out.")
-            status_url = get_export_content_status_url(self.state.deployment, search_content_id, job_id)
-            response = requests.get(
-                url=status_url,
-                auth=auth(self.state.access_key, self.state.access_id)
-            )
-            status = response.json()["status"]
-            if status.lower() == "success":
-                # Job is complete
-                break
-            elif status.lower() == "failed":
-                # Job encountered an error
-                raise Exception("Job encountered an error")
+        return json.loads(response.content)['id']
+
+    def saved_search_export_job(self, search_content_id: str, job_id: str) -> Job:
+        status_url = get_export_content_status_url(self.state.deployment, search_content_id, job_id)
+        return Job(
+            (search_content_id, job_id),
+            lambda: self.api_client.get(status_url, endpoint="content_export"),
+            success_status="success",
+            failure_status="failed",
+            timeout=30,
+            kind="export"
+        )
 
-            # Wait for a short time before checking the status again
-            time.sleep(1)
+    @staticmethod
+    def check_saved_search_export_job(job: Job) -> None:
+        search_content_id, _ = job.key
+        if job.error:
+            raise Exception(f"Exporting content id={search_content_id} failed: {job.error}")
+        if not job.success:
+            raise Exception(f"Job encountered an error: {job.message}")
 
+    def get_saved_search_export_result(self, search_content_id: str, job_id: str) -> Tuple[str, Dict[str, Any]]:
         result_url = get_export_content_result_url(self.state.deployment, search_content_id, job_id)
 
-        response = requests.get(
-            url=result_url,
-            auth=auth(self.state.access_key, self.state.access_id),
-        )
+        response = self.api_client.get(result_url, endpoint="content_export")
 
         if response.status_code != 200:
             raise Exception(f"Failed to get saved search result. Status code {response.status_code}: {response.text}")
 
-        return response.json()
-
-    def json_to_terraform_resource(self, data: Dict[str, Any], parent_id_folder_name_tf: str) -> str:
-        terraform_resource = f'''resource "sumologic_log_search" "{slugify(data.get('name', ''), '_')}" {{
-        name = "{data.get('name', '')}"
-        parent_id = sumologic_folder.{parent_id_folder_name_tf}_folder.id
-        query_string = {json.dumps(data['search']['queryText'])}
-
-        {f'description = "{data.get("description", "")}"' if data.get("description") else ""}
-        {f'parsing_mode = "{data.get("search", {}).get("parsingMode", "")}"' if data.get("search", {}).get("parsingMode") else ""}
-        {f'run_by_receipt_time = {str(data.get("search", {}).get("byReceiptTime", "")).lower()}' if data.get("search", {}).get("byReceiptTime") is not None else ""}
-
-        time_range {{
-            begin_bounded_time_range {{
-                from {{
-                    relative_time_range {{
-                        relative_time = "{data.get("search", {}).get("defaultTimeRange", "")}"
-                    }}
-                }}
-            }}
-        }}'''
-
-        if data.get('searchSchedule'):
-            schedule = data['searchSchedule']
-            terraform_resource += f'''
-        schedule {{
-            cron_expression = "{schedule.get('cronExpression', '')}"
-            displayable_time_range = "{schedule.get('displayableTimeRange', '')}"
-            time_zone = "{schedule.get('timeZone', '')}"
-
-            {f'mute_error_emails = {str(schedule.get("muteErrorEmails", "")).lower()}' if schedule.get("muteErrorEmails") is not None else ""}
-            {f'schedule_type = "{schedule.get("scheduleType", "")}"' if schedule.get("scheduleType") else ""}
-
-            parseable_time_range {{
-                begin_bounded_time_range {{
-                    from {{
-                        relative_time_range {{
-                            relative_time = "{schedule.get("parseableTimeRange", {}).get("from", {}).get("relativeTime", "") if schedule.get("parseableTimeRange") and schedule.get("parseableTimeRange").get("from") else ""}"
-                        }}
-                    }}
-                }}
-            }}'''
-
-            threshold = schedule.get("threshold", {})
-            if threshold is not None:  # Checking for None before accessing further keys
-                terraform_resource += f'''
-            threshold {{
-                count = {threshold.get("count", "")}
-                operator = "{threshold.get("operator", "")}"
-                threshold_type = "{threshold.get("thresholdType", "")}"
-            }}'''
-
-            notification = schedule.get("notification", {})
-            if notification is not None:  # Checking for None before accessing further keys
-                terraform_resource += f'''
-            notification {{
-                email_search_notification {{
-                    include_csv_attachment = false
-                    include_histogram = false
-                    include_query = true
-                    include_result_set = true
-                    subject_template = "Search Alert: {{TriggerCondition}} found for {{SearchName}}"
-                    to_list = [
-                        "{notification.get("viewName", "")}",
-                    ]
-                }}
-            }}'''
-
-        terraform_resource += "\n}\n"
-
-        return terraform_resource
-
-    def terraformize_dashboards(self, dashboard_ids: List[str], local_dest_path: str,
-                                output_path: str, folders_dict: Dict[str, Dict[str, Any]], app_folder_id: str) -> None:
+        return search_content_id, response.json()
+
+    def json_to_terraform_resource(self, writer: HclWriter, data: Dict[str, Any], parent_folder_reference: str) -> None:
+        search = data.get("search", {})
+        with writer.block("resource", "sumologic_log_search", slugify(data.get('name', ''), '_')):
+            writer.string("name", data.get('name', ''))
+            writer.attribute("parent_id", parent_folder_reference)
+            writer.string("query_string", search['queryText'])
+            if data.get("description"):
+                writer.string("description", data["description"])
+            if search.get("parsingMode"):
+                writer.string("parsing_mode", search["parsingMode"])
+            if search.get("byReceiptTime") is not None:
+                writer.attribute("run_by_receipt_time", hcl_bool(search["byReceiptTime"]))
+
+            self.write_relative_time_range(writer, "time_range", search.get("defaultTimeRange", ""))
+
+            if data.get('searchSchedule'):
+                schedule = data['searchSchedule']
+                with writer.block("schedule"):
+                    writer.string("cron_expression", schedule.get('cronExpression', ''))
+                    writer.string("displayable_time_range", schedule.get('displayableTimeRange', ''))
+                    writer.string("time_zone", schedule.get('timeZone', ''))
+                    if schedule.get("muteErrorEmails") is not None:
+                        writer.attribute("mute_error_emails", hcl_bool(schedule["muteErrorEmails"]))
+                    if schedule.get("scheduleType"):
+                        writer.string("schedule_type", schedule["scheduleType"])
+
+                    parseable_time_range = schedule.get("parseableTimeRange") or {}
+                    self.write_relative_time_range(writer, "parseable_time_range",
+                                                   (parseable_time_range.get("from") or {}).get("relativeTime", ""))
+
+                    threshold = schedule.get("threshold", {})
+                    if threshold is not None:  # Checking for None before accessing further keys
+                        with writer.block("threshold"):
+                            writer.attribute("count", str(threshold.get("count", 0)))
+                            writer.string("operator", threshold.get("operator", ""))
+                            writer.string("threshold_type", threshold.get("thresholdType", ""))
+
+                    notification = schedule.get("notification", {})
+                    if notification is not None:  # Checking for None before accessing further keys
+                        with writer.block("notification"), writer.block("email_search_notification"):
+                            writer.attribute("include_csv_attachment", "false")
+                            writer.attribute("include_histogram", "false")
+                            writer.attribute("include_query", "true")
+                            writer.attribute("include_result_set", "true")
+                            writer.string("subject_template", "Search Alert: {TriggerCondition} found for {SearchName}")
+                            with writer.list_attribute("to_list"):
+                                writer.string_item(notification.get("viewName", ""))
+
+    @staticmethod
+    def write_relative_time_range(writer: HclWriter, block_type: str, relative_time: str) -> None:
+        with writer.block(block_type), writer.block("begin_bounded_time_range"), writer.block("from"), \
+                writer.block("relative_time_range"):
+            writer.string("relative_time", relative_time)
+
+    def terraformize_dashboards(self, snapshot: ContentSnapshot, dashboard_ids: List[str],
+                                output_path: str) -> Dict[str, str]:
+        """
+        Run terraformer for `dashboard_ids` and return the raw resource block of each dashboard, keyed by dashboard
+        id. Folder ids and resource names are fixed once the blocks are written to dashboards.tf.
+
+        The ids are split into shards of `terraformer_shard_size` dashboards. Every shard is imported by its own
+        terraformer process into its own directory, `terraformer_workers` shards at a time, so a dashboard that
+        terraformer fails on only drops the dashboards of its shard.
+        """
+        if not dashboard_ids:
+            return {}
+        if not self.terraformer_path:
+            print("Error: The terraformer path is not set, start the tool with --terraformer_path")
+            return {}
+
+        shard_size = max(1, self.terraformer_shard_size)
+        shards = [dashboard_ids[i:i + shard_size] for i in range(0, len(dashboard_ids), shard_size)]
+
+        # every import gets its own directory, so concurrent imports never share terraformer output
+        os.makedirs(output_path, exist_ok=True)
+        import_path = tempfile.mkdtemp(prefix="terraformer-", dir=output_path)
         try:
-            terraformer_flags = f"import sumologic -v --resources=dashboard --filter 'Name=id;Value={':'.join(dashboard_ids)}' -o '{output_path}'"
-
-            # Print the exact command being run
-            command_str = f"{self.terraformer_path} {terraformer_flags}"
-            # Ensure that flags are passed correctly
-
-            if self.state.deployment not in ["stag", "long"]:
-                os.environ["SUMOLOGIC_ENVIRONMENT"] = self.state.deployment
-            else:
-                os.environ["SUMOLOGIC_BASE_URL"] = resolve_base_api_url(self.state.deployment)
-            os.environ["SUMOLOGIC_ACCESS_ID"] = self.state.access_id
-            os.environ["SUMOLOGIC_ACCESS_KEY"] = self.state.access_key
-
-            print(f"Running command {command_str}")
-            try:
-                subprocess.run(command_str, text=True, shell=True, capture_output=True, env=os.environ)
-            except subprocess.CalledProcessError as cpe:
-                print(f"Error: Terraform process failed with return code {cpe.returncode}. Error message: {cpe.stderr}")
-
-            # After successful translation, dashboards are saved in `output_path/sumologic/dashboard/dashboard.tf
-            # this file should be moved to `output_path/resources/` folder and folder ids should be fixed
-            dst_path = os.path.join(local_dest_path, "resources", "dashboards.tf")
-            src_path = os.path.join(output_path, "sumologic", "dashboard", "dashboard.tf")
-            generated_folder_path = os.path.join(output_path, "sumologic")
-            shutil.move(src_path, dst_path)
-            shutil.rmtree(generated_folder_path)
-            self.replace_folder_id_in_file(folders_dict, dst_path, app_folder_id)
-            self.fix_dashboards(dst_path)
-
-        except Exception as e:
-            print(f"Error: An unexpected error occurred: {e}")
-
-    def replace_folder_id_in_file(self, folders_dict: Dict[str, Dict[str, Any]], file_path: str,
-                                  app_folder_id: str) -> None:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-
-        # Define a regex pattern to match the folder_id line
-        pattern = r'(folder_id\s*=\s*)(")([0-9A-Za-z]+)(")'
-
-        def replace_id(match):
-            original_id = match.group(3)
-            if original_id == app_folder_id:
-                real_id = "sumologic_folder.integration_folder.id"
-            else:
-                real_id = f"sumologic_folder.{slugify(str(folders_dict[original_id]['name']), '_')}_folder.id"
-            return f'{match.group(1)}{real_id}'
-
-        # Replace the matched IDs using the re.sub() method
-        updated_content = re.sub(pattern, replace_id, content)
-
-        # Save the updated content to the file
-        with open(file_path, 'w', encoding='utf-8') as file:
-            file.write(updated_content)
-
-    def fix_dashboards(self, file_path: str) -> None:
+            with ThreadPoolExecutor(max_workers=min(self.terraformer_workers, len(shards))) as executor:
+                shard_blocks = list(executor.map(
+                    self.terraformize_dashboard_shard, shards,
+                    [os.path.join(import_path, f"shard-{index:04d}") for index in range(len(shards))]))
+        finally:
+            shutil.rmtree(import_path, ignore_errors=True)
+
+        blocks = {}
+        for shard_ids, shard_result in zip(shards, shard_blocks):
+            for dashboard_id in shard_ids:
+                if dashboard_id in shard_result:
+                    blocks[dashboard_id] = shard_result[dashboard_id]
+        return blocks
+
+    def terraformize_dashboard_shard(self, dashboard_ids: List[str], output_path: str) -> Dict[str, str]:
+        args = [self.terraformer_path, "import", "sumologic", "-v", "--resources=dashboard",
+                "--filter", f"Name=id;Value={':'.join(dashboard_ids)}", "-o", output_path]
+        print(f"Running command {' '.join(args)}")
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                lines = file.readlines()
-
-            prefix = "title = "
-            suffix_to_remove = " - New"
-            processed_lines = []
-            for line in lines:
-                if 'resource "sumologic_dashboard"' in line:
-                    line = re.sub(r'tfer--[a-zA-Z0-9-]*-_', '', line)
-                    line = re.sub(r'-[a-zA-Z0-9]*(?=" {)', '', line)
-                stripped_line = line.lstrip()
-                if stripped_line.startswith(prefix) and suffix_to_remove in stripped_line:
-                    line = line.replace(suffix_to_remove, "")
-                processed_lines.append(line)
-
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.writelines(processed_lines)
-        except Exception as e:
-            print(f"Error: An unexpected error occurred while fixing dashboard resource names: {e}")
-
-    def generate_output_tf(self, dashboards_tf_path: str, folders_tf_path: str, searches_tf_path) -> str:
-        def extract_resource_names(file_path, resource_type):
-            resource_names = []
-
-            # Regular expression to match the desired pattern
-            pattern = re.compile(fr'resource "{resource_type}" "(.+)" {{')
-
-            if os.path.exists(file_path):
-                # Open the file and read its lines
-                with open(file_path, 'r') as file:
-                    for line in file.readlines():
-                        # Search for the pattern in the current line
-                        match = pattern.search(line)
-
-                        # If a match is found, extract the resource name and add it to the list
-                        if match:
-                            resource_name = match.group(1)
-                            resource_names.append(resource_name)
-
-            return resource_names
-
-        def generate_output_text(output_name, resource_type, object_names, name_attribute_name):
-            output_text = f'output "{output_name}" {{\n'
-            output_text += f'  description = "all the {output_name}"\n'
-            output_text += '  value       = [\n'
-
-            for name in object_names:
-                output_text += f'    {{\n'
-                output_text += f'      "id" = {resource_type}.{name}.id,\n'
-                output_text += f'      "name" = {resource_type}.{name}.{name_attribute_name},\n'
-                output_text += f'    }},\n'
-
-            # Remove the extra comma and close the brackets
-            output_text = output_text[:-2] + "\n"
-            output_text += '  ]\n'
-            output_text += '}\n\n'
-
-            return output_text
-
-        dashboard_resource_names = extract_resource_names(dashboards_tf_path, "sumologic_dashboard")
-        folder_resource_names = extract_resource_names(folders_tf_path, "sumologic_folder")
-        search_resource_names = extract_resource_names(searches_tf_path, "sumologic_log_search")
-
-        output_tf = ""
-
-        if dashboard_resource_names:
-            output_tf += generate_output_text("dashboards", "sumologic_dashboard", dashboard_resource_names, "title")
-        if folder_resource_names:
-            output_tf += generate_output_text("folders", "sumologic_folder", folder_resource_names, "name")
-        if search_resource_names:
-            output_tf += generate_output_text("log_searches", "sumologic_log_search", search_resource_names, "name")
-
-        return output_tf
+            result = self.process_runner.run(args, env=self.terraformer_environment(),
+                                             timeout=self.terraformer_timeout, cancel_event=self.cancel_event,
+                                             log_prefix=f"[terraformer {os.path.basename(output_path)}] ")
+        except OSError as e:
+            print(f"Error: Could not run terraformer: {e}")
+            return {}
+
+        if not result.success:
+            print(f"Error: Terraformer failed for dashboards {', '.join(dashboard_ids)}: {result.describe()}")
+            return {}
+
+        # After successful translation, dashboards are saved in `output_path/sumologic/dashboard/dashboard.tf
+        src_path = os.path.join(output_path, "sumologic", "dashboard", "dashboard.tf")
+        try:
+            with open(src_path, 'r', encoding='utf-8') as file:
+                blocks = self.split_dashboard_blocks(file)
+        except OSError as e:
+            print(f"Error: Terraformer output of dashboards {', '.join(dashboard_ids)} could not be read: {e}")
+            return {}
+
+        print(f"Terraformer imported {len(blocks)} of {len(dashboard_ids)} dashboards in {result.duration:.1f}s")
+        missing_ids = [dashboard_id for dashboard_id in dashboard_ids if dashboard_id not in blocks]
+        if missing_ids:
+            print(f"Warning: Terraformer output is missing dashboards {', '.join(missing_ids)}, they are not imported")
+        return blocks
+
+    def terraformer_environment(self) -> Dict[str, str]:
+        """
+        Environment of terraformer processes: the environment of the tool plus the credentials of the current
+        deployment. The environment of the tool itself is left untouched.
+        """
+        env = dict(os.environ)
+        if self.state.deployment not in ["stag", "long"] and not os.environ.get(API_BASE_URL_VARIABLE):
+            env["SUMOLOGIC_ENVIRONMENT"] = self.state.deployment
+        else:
+            env["SUMOLOGIC_BASE_URL"] = resolve_base_api_url(self.state.deployment)
+        env["SUMOLOGIC_ACCESS_ID"] = self.state.access_id
+        env["SUMOLOGIC_ACCESS_KEY"] = self.state.access_key
+        return env
+
+    @staticmethod
+    def split_dashboard_blocks(lines: Iterable[str]) -> Dict[str, str]:
+        """
+        Split terraformer output into `sumologic_dashboard` resource blocks, keyed by the dashboard id that
+        terraformer appends to every resource name.
+        """
+        blocks = {}
+        dashboard_id = None
+        block_lines = []
+        for line in lines:
+            if dashboard_id is None:
+                match = DASHBOARD_RESOURCE_PATTERN.match(line)
+                if match:
+                    dashboard_id = match.group(1)
+                    block_lines = [line]
+                continue
+            block_lines.append(line)
+            if line.rstrip() == "}":
+                blocks[dashboard_id] = "".join(block_lines)
+                dashboard_id = None
+        return blocks
+
+    def write_dashboards_tf(self, blocks: Iterable[Tuple[str, str]], file_path: str, folder_index: FolderIndex,
+                            registry: Optional[ResourceRegistry] = None) -> List[str]:
+        """
+        Write terraformer's dashboard resource blocks, given as (dashboard id, block) pairs, to `file_path` in a
+        single pass. Folder ids are replaced with references to the folder resources, terraformer's prefix and
+        dashboard id are removed from the resource names and the " - New" suffix is removed from the titles.
+
+        A dashboard that can't be converted is reported and left out; the ids of those dashboards are returned.
+        """
+        def replace_id(match):
+            return f'{match.group(1)}{folder_index.reference(match.group(3))}'
+
+        skipped_ids = []
+        written = 0
+        with LazyFile(file_path) as file:
+            for dashboard_id, block in blocks:
+                resource = None
+                lines = []
+                try:
+                    for line in block.splitlines(keepends=True):
+                        if line.startswith('resource "sumologic_dashboard"'):
+                            line = TERRAFORMER_NAME_PREFIX_PATTERN.sub('', line)
+                            line = TERRAFORMER_NAME_ID_PATTERN.sub('', line)
+                            resource = RESOURCE_HEADER_PATTERN.match(line)
+                        if "folder_id" in line:
+                            line = FOLDER_ID_PATTERN.sub(replace_id, line)
+                        if NEW_TITLE_SUFFIX in line and line.lstrip().startswith("title = "):
+                            line = line.replace(NEW_TITLE_SUFFIX, "")
+                        lines.append(line)
+                except KeyError as e:
+                    print(f"Error: Dashboard {dashboard_id} is in folder {e} which is not part of the app, "
+                          f"it is skipped")
+                    skipped_ids.append(dashboard_id)
+                    continue
+
+                if resource and registry is not None:
+                    registry.add(resource.group(1), resource.group(2))
+                if written:
+                    file.write("\n")
+                file.write("".join(lines))
+                written += 1
+        return skipped_ids
+
+    def generate_output_tf(self, writer: HclWriter, registry: ResourceRegistry) -> None:
+        def generate_output(output_name, resource_type, name_attribute_name):
+            object_names = registry.names(resource_type)
+            if not object_names:
+                return
+            with writer.block("output", output_name):
+                writer.string("description", f"all the {output_name}")
+                with writer.list_attribute("value"):
+                    for name in object_names:
+                        writer.object_item(id=f"{resource_type}.{name}.id",
+                                           name=f"{resource_type}.{name}.{name_attribute_name}")
+            writer.blank_line()
+
+        generate_output("dashboards", "sumologic_dashboard", "title")
+        generate_output("folders", "sumologic_folder", "name")
+        generate_output("log_searches", "sumologic_log_search", "name")
 
     def get_screenshot_folder(self, app_folder_name):
         current_directory = os.getcwd()
@@ -477,34 +701,134 @@ class AppContentManager:
             os.makedirs(cropped_screenshot_folder_path)
         return screenshot_folder_path, cropped_screenshot_folder_path
 
-    def download_screenshots(self, app_folder_id):
-        file_ext = "png"
-        try:
-            _, content_dict = self.get_app_content_with_folders(app_folder_id)
-            dashboard_content = self.filter_dashboards(content_dict)
-            dashboard_content_ids = [dashboard["id"] for dashboard in dashboard_content]
-            dashboards = self.get_dashboards(dashboard_content_ids)
-
-            screenshot_folder_path, cropped_screenshot_folder_path = self.get_screenshot_folder(
-                slugify_name(self.state.app_work_name))
-
-            for dashboard in dashboards:
-                dashboard_name = dashboard.get("title")
-                variables = dashboard.get("variables")
-                dashboard_screenshot_image_name = "%s.%s" % (slugify_name(dashboard_name), file_ext)
-                downloaded_screenshot_image_path = os.path.join(screenshot_folder_path, dashboard_screenshot_image_name)
-                cropped_screenshot_image_path = os.path.join(cropped_screenshot_folder_path,
-                                                             dashboard_screenshot_image_name)
-                preview_images_screenshot_path = os.path.join(preview_images_path(self.state.app_work_name), dashboard_screenshot_image_name)
-                self.take_dashboard_screenshot(dashboard['id'], variables, downloaded_screenshot_image_path)
-                self.crop_dashboard_screenshot(downloaded_screenshot_image_path, preview_images_screenshot_path)
-                self.add_screenshot_reference_to_manifest(dashboard, preview_images_screenshot_path,
-                                                          manifest_path(self.state.app_work_name))
+    def download_screenshots(self, snapshot: ContentSnapshot, dashboards: Optional[List[Dict[str, Any]]] = None,
+                             stale_images: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """
+        Take screenshots of `dashboards` (all dashboards of the snapshot by default) and return the preview image
+        path of each, keyed by dashboard content id.
 
+        :param stale_images: previously taken screenshots to replace, keyed by dashboard content id
+        """
+        try:
+            return self.render_dashboard_screenshots(
+                snapshot.dashboards if dashboards is None else dashboards, snapshot.versions, stale_images,
+                self.screenshot_image_names(snapshot.dashboards, stale_images))
         except Exception as e:
             print(f"Error occurred in downloading screenshots. Error: {e} Traceback: {traceback.format_exc()}")
-
-    def take_dashboard_screenshot(self, dashboard_id, variables, image_filepath):
+            return {}
+
+    @staticmethod
+    def screenshot_image_names(dashboards: List[Dict[str, Any]],
+                               stale_images: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """
+        File name of the screenshot of every dashboard, keyed by content id. Dashboards whose titles slugify to the
+        same name, or to the name of another dashboard's previous screenshot, get their content id appended.
+        """
+        slugs = {dashboard["contentId"]: slugify_name(dashboard.get("title")) for dashboard in dashboards}
+        slug_counts = Counter(slugs.values())
+        stale_owners = {os.path.basename(path): content_id for content_id, path in (stale_images or {}).items()}
+        names = {}
+        for content_id, slug in slugs.items():
+            name = f"{slug}.png"
+            if slug_counts[slug] > 1 or stale_owners.get(name, content_id) != content_id:
+                name = f"{slug}-{content_id}.png"
+            names[content_id] = name
+        return names
+
+    def render_dashboard_screenshots(self, dashboards: List[Dict[str, Any]],
+                                     versions: Optional[Dict[str, Optional[str]]] = None,
+                                     stale_images: Optional[Dict[str, str]] = None,
+                                     image_names: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """
+        Render, download and crop screenshots of all `dashboards` concurrently.
+
+        Cached screenshots are not rendered again. All other report jobs are submitted at once and polled together;
+        every screenshot is downloaded as soon as its job finishes and cropped in a pool of `screenshot_workers`
+        threads. Once all screenshots are done, the manifest is updated in a single write, in the order of
+        `dashboards`. A dashboard that fails doesn't stop the others and keeps its stale image; the stale images of
+        all other dashboards are deleted once the new ones are written.
+        """
+        versions = versions or {}
+        stale_images = stale_images or {}
+        image_names = image_names or self.screenshot_image_names(dashboards, stale_images)
+        cache_namespace = self.cache_namespace("screenshots")
+        screenshot_folder_path, _ = self.get_screenshot_folder(slugify_name(self.state.app_work_name))
+        os.makedirs(preview_images_path(self.state.app_work_name), exist_ok=True)
+
+        screenshots = []
+        for dashboard in dashboards:
+            dashboard_screenshot_image_name = image_names[dashboard["contentId"]]
+            screenshots.append((
+                dashboard,
+                os.path.join(screenshot_folder_path, dashboard_screenshot_image_name),
+                os.path.join(preview_images_path(self.state.app_work_name), dashboard_screenshot_image_name)
+            ))
+
+        def start_report(screenshot):
+            dashboard = screenshot[0]
+            try:
+                return self.start_dashboard_report(dashboard['id'], dashboard.get("variables"))
+            except Exception as e:
+                print(f"Failed to render screenshot of dashboard {dashboard.get('title')}: {e}")
+                return None
+
+        def download_and_crop(screenshot, job_id):
+            dashboard, downloaded_screenshot_image_path, preview_images_screenshot_path = screenshot
+            if job_id:
+                self.download_dashboard_report(job_id, downloaded_screenshot_image_path)
+                self.content_cache.put_file(cache_namespace, dashboard["contentId"],
+                                            versions.get(dashboard["contentId"]), downloaded_screenshot_image_path)
+            return crop_executor.submit(self.crop_dashboard_screenshot, downloaded_screenshot_image_path,
+                                        preview_images_screenshot_path)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as download_executor, \
+                ThreadPoolExecutor(max_workers=self.screenshot_workers) as crop_executor:
+            downloads = {}
+            for index, (dashboard, downloaded_screenshot_image_path, _) in enumerate(screenshots):
+                if self.content_cache.get_file(cache_namespace, dashboard["contentId"],
+                                               versions.get(dashboard["contentId"]), downloaded_screenshot_image_path):
+                    downloads[index] = download_executor.submit(download_and_crop, screenshots[index], None)
+
+            rendered = [index for index in range(len(screenshots)) if index not in downloads]
+            job_ids = dict(zip(rendered, download_executor.map(start_report, [screenshots[i] for i in rendered])))
+            jobs = [self.dashboard_report_job(job_id, index) for index, job_id in job_ids.items() if job_id]
+
+            for job in JobPoller(cancel_event=self.cancel_event).as_completed(jobs):
+                screenshot = screenshots[job.key]
+                if job.error or not job.success:
+                    print(f"Failed to render screenshot of dashboard {screenshot[0].get('title')}: "
+                          f"{job.error or job.message}")
+                    continue
+                downloads[job.key] = download_executor.submit(download_and_crop, screenshot, job_ids[job.key])
+
+            manifest_writer = ManifestMediaWriter(manifest_path(self.state.app_work_name))
+            preview_images = {}
+            for index, screenshot in enumerate(screenshots):
+                if index not in downloads:
+                    continue
+                dashboard, _, preview_images_screenshot_path = screenshot
+                try:
+                    downloads[index].result().result()
+                except Exception as e:
+                    print(f"Failed to download screenshot of dashboard {dashboard.get('title')}: {e}")
+                    continue
+                manifest_writer.add_image(dashboard["title"], dashboard.get("description"),
+                                          preview_images_screenshot_path)
+                preview_images[dashboard["contentId"]] = preview_images_screenshot_path
+
+        rendered_content_ids = {dashboard["contentId"] for dashboard in dashboards}
+        written_paths = set(preview_images.values())
+        for content_id, stale_image_path in stale_images.items():
+            if content_id in rendered_content_ids and content_id not in preview_images:
+                continue
+            if stale_image_path not in written_paths:
+                manifest_writer.remove_image(stale_image_path)
+                if os.path.exists(stale_image_path):
+                    os.remove(stale_image_path)
+        manifest_writer.write()
+        return preview_images
+
+    def start_dashboard_report(self, dashboard_id, variables) -> str:
         download_endpoint = download_screenshot_endpoint(self.state.deployment)
         payload = {
             "action": {
@@ -530,100 +854,61 @@ class AppContentManager:
                 "data": {variable.get("name"): [variable.get("defaultValue", "*")] for variable in variables}
             }
 
-        response = requests.post(
-            url=download_endpoint,
-            auth=auth(self.state.access_key, self.state.access_id),
-            headers={'Content-Type': 'application/json'},
-            data=json.dumps(payload)
-        )
+        response = self.api_client.post(download_endpoint, endpoint="report_jobs", json=payload)
 
-        if response.ok:
-            job_id = json.loads(response.content)['id']
-            status_endpoint = f"{download_endpoint}/{job_id}/status"
-
-            wait_for_job_completion(
-                get_status=lambda: requests.get(url=status_endpoint, auth=auth(self.state.access_key, self.state.access_id)),
-                success_status="success",
-                failure_status="failed",
-                polling_interval=1,
-                timeout=180
-            )
-
-            # downloading actual raw image file
-            download_result_endpoint = f"{download_endpoint}/{job_id}/result"
-            response = requests.get(
-                url=download_result_endpoint,
-                auth=auth(self.state.access_key, self.state.access_id),
-                headers={
-                    'Content-Type': 'application/json'
-                },
-                stream=True,
-            )
-            if response.ok:
-                with open(image_filepath, 'wb') as fout:
-                    shutil.copyfileobj(response.raw, fout)
-            else:
-                raise Exception(f"Error in dashboards/reportJobs/result api: {response.content}")
-        else:
+        if not response.ok:
             raise Exception(f"Error in dashboards/reportJobs api: {response.content}")
 
-    def crop_dashboard_screenshot(self, source_imagepath, target_imagepath):
-        image = Image.open(source_imagepath)
-        # background color for dark themed screenshots
-        bg_color = (16, 24, 39, 255)
-        img_copy = image.copy()
-        for y in range(img_copy.size[1]):
-            for x in range(img_copy.size[0]):
-                if img_copy.getpixel((x, y)) == bg_color:
-                    img_copy.putpixel((x, y), (0, 0, 0, 0))
-
-        (topLeftX, topLeftY, bottomRightX, bottomRightY) = img_copy.getbbox()
-        cropped = image.crop((0, 0, bottomRightX, bottomRightY))
-        cropped.save(target_imagepath)
-
-    def add_screenshot_reference_to_manifest(self, dashboard_data, screenshot_path, manifest_path):
-        # Convert the screenshot path to a relative path
-        relative_path = os.path.relpath(screenshot_path, start=os.path.dirname(manifest_path))
-        relative_path = relative_path.replace('\\', '/')  # Convert to forward slashes for consistency
-        if not relative_path.startswith('.'):
-            relative_path = f"./{relative_path}"
-
-        # Prepare the new appMedia entry with proper quoting and indentation
-        new_media_entry = (
-            f'  - title: "{dashboard_data["title"]}"\n'
-            f'    description: "{dashboard_data["description"]}"\n'
-            f'    type: "image"\n'
-            f'    location: "{relative_path}"\n'
+        return json.loads(response.content)['id']
+
+    def dashboard_report_job(self, job_id: str, key: Any = None) -> Job:
+        status_endpoint = download_screenshot_status_endpoint(self.state.deployment, job_id)
+        return Job(
+            job_id if key is None else key,
+            lambda: self.api_client.get(status_endpoint, endpoint="report_jobs"),
+            success_status="success",
+            failure_status="failed",
+            timeout=180,
+            kind="report"
         )
 
-        # Read in the file
-        with open(manifest_path, 'r') as file:
-            lines = file.readlines()
-
-        # Locate the appMedia list and the insertion point
-        app_media_index = None
-        for i, line in enumerate(lines):
-            if line.strip() == 'appMedia:':
-                app_media_index = i
-                break
-
-        # If appMedia field not found, raise an error
-        if app_media_index is None:
-            raise ValueError("appMedia field not found in the manifest.")
-
-        # Find the end of the appMedia list
-        insert_index = app_media_index + 1
-        while insert_index < len(lines):
-            if lines[insert_index].strip().startswith('- title:'):
-                insert_index += 1
-            elif lines[insert_index].strip() == '':
-                break
-            else:
-                insert_index += 1
-
-        # Insert the new media entry at the correct index
-        lines.insert(insert_index, new_media_entry)
+    def download_dashboard_report(self, job_id: str, image_filepath: str) -> None:
+        # downloading actual raw image file
+        download_result_endpoint = download_screenshot_result_endpoint(self.state.deployment, job_id)
+        response = self.api_client.get(download_result_endpoint, endpoint="report_jobs", stream=True)
+        if response.ok:
+            with open(image_filepath, 'wb') as fout:
+                shutil.copyfileobj(response.raw, fout)
+        else:
+            raise Exception(f"Error in dashboards/reportJobs/result api: {response.content}")
 
-        # Write everything back to the file
-        with open(manifest_path, 'w') as file:
-            file.writelines(lines)
+    def crop_dashboard_screenshot(self, source_imagepath, target_imagepath):
+        with get_tracer().span("crop"), Image.open(source_imagepath) as image:
+            (topLeftX, topLeftY, bottomRightX, bottomRightY) = self.screenshot_content_bbox(image)
+            cropped = image.crop((0, 0, bottomRightX, bottomRightY))
+            # a previous screenshot at the same path is only replaced by a complete image
+            root, extension = os.path.splitext(target_imagepath)
+            temp_imagepath = f"{root}.tmp{extension}"
+            cropped.save(temp_imagepath)
+        os.replace(temp_imagepath, target_imagepath)
+
+    @staticmethod
+    def screenshot_content_bbox(image: Image.Image) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Bounding box of the screenshot content, i.e. of all pixels that are neither the dark theme background nor
+        fully transparent.
+
+        The mask is built with per-band lookup tables and channel operations instead of visiting pixels one by one.
+        """
+        if image.mode != "RGBA":
+            # only RGBA pixels can be equal to the background color
+            return image.getbbox()
+
+        bands = image.split()
+        # 255 wherever a band differs from the background component, 0 elsewhere
+        band_masks = [band.point([0 if value == component else 255 for value in range(256)])
+                      for band, component in zip(bands, DARK_THEME_BACKGROUND_COLOR)]
+        not_background = functools.reduce(ImageChops.lighter, band_masks)
+        # transparent pixels never count as content, same as `getbbox` of an RGBA image
+        content = ImageChops.darker(not_background, bands[3])
+        return content.getbbox()
@@ -1,15 +1,57 @@
 import platform
 import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List
 
+from app.api_client import DEFAULT_MAX_REQUESTS_PER_SECOND, ApiClient, connection_pool_size
 from app.app_content_manager import AppContentManager
 from app.common import *
+from app.content_cache import ContentCache
+from app.instrumentation import OPERATION, get_tracer
+from app.manifest_writer import write_manifest_name
+from app.multipart_upload import ProgressCallback
+from app.packager import DEFAULT_COMPRESSION_LEVEL, Packager
 from app.state import State
 
 
+# number of test apps registered, uploaded or deleted at the same time
+MAX_PARALLEL_UPLOADS = 4
+
+
 class AppManager:
-    def __init__(self, state: State, terraformer_path: str):
+    def __init__(self, state: State, terraformer_path: str, content_cache: Optional[ContentCache] = None,
+                 terraformer_shard_size: int = DEFAULT_TERRAFORMER_SHARD_SIZE,
+                 terraformer_workers: Optional[int] = None, compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+                 max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+                 screenshot_workers: Optional[int] = None,
+                 max_requests_per_second: Optional[float] = DEFAULT_MAX_REQUESTS_PER_SECOND):
         self.state = state
-        self.app_content_manager = AppContentManager(state, terraformer_path)
+        self.packager = Packager(compression_level)
+        # enough connections for the widest request pool, the crawl and screenshot downloads or the test uploads
+        # and background deletions, plus the job poller
+        pool_size = connection_pool_size(max(max_concurrent_requests, 2 * MAX_PARALLEL_UPLOADS))
+        # None sends requests as fast as the concurrency allows, e.g. against a local mock server
+        self.api_client = ApiClient(state, pool_size, max_requests_per_second)
+        # cancels the running import, export or test, see `cancel`
+        self.cancel_event = threading.Event()
+        # test apps are deleted in the background, see `delete_private_app_in_background`
+        self.cleanup_executor = ThreadPoolExecutor(max_workers=MAX_PARALLEL_UPLOADS, thread_name_prefix="cleanup")
+        self.pending_cleanups: List[Future] = []
+        self._cleanup_lock = threading.Lock()
+        self.app_content_manager = AppContentManager(state, terraformer_path, self.api_client,
+                                                     max_concurrent_requests=max_concurrent_requests,
+                                                     screenshot_workers=screenshot_workers,
+                                                     content_cache=content_cache,
+                                                     terraformer_shard_size=terraformer_shard_size,
+                                                     terraformer_workers=terraformer_workers,
+                                                     cancel_event=self.cancel_event)
+
+    def cancel(self):
+        """
+        Cancel the running operation. It stops with `OperationCancelled` at its next check.
+        """
+        self.cancel_event.set()
 
     def edit_manifest(self):
         self.open_text_file_in_editor(manifest_path(self.state.app_work_name))
@@ -26,12 +68,25 @@ class AppManager:
     def set_icon(self, src):
         shutil.copy(src, icon_path(self.state.app_work_name))
 
-    def import_resources(self, resourceId):
-        self.app_content_manager.import_content(format_hex(resourceId), app_root_path(self.state.app_work_name))
+    def import_resources(self, resourceId, incremental=False):
+        with get_tracer().span("import", OPERATION, app=self.state.app_work_name, incremental=incremental):
+            self.app_content_manager.import_content(format_hex(resourceId),
+                                                    app_root_path(self.state.app_work_name), incremental)
 
-    def save_and_export(self):
+    def save_and_export(self) -> str:
+        """
+        Package the app under the name from its manifest and return the path of the package.
+        """
         app_name = read_name_from_yaml(manifest_path(self.state.app_work_name))
-        zip_folder(app_root_path(self.state.app_work_name), app_results_path(app_name))
+        with get_tracer().span("export", OPERATION, app=self.state.app_work_name):
+            result = self.packager.pack(app_root_path(self.state.app_work_name),
+                                        app_results_path(app_name) + ".zip", export_manifest_path(app_name))
+        if result.rebuilt:
+            print(f"Folder zipped as {result.zip_path} ({result.compressed} files compressed, "
+                  f"{result.copied} unchanged files copied)")
+        else:
+            print(f"{result.zip_path} is up to date")
+        return result.zip_path
 
     def create_new_app_package(self, app_name):
         # Remove the app package directory if it exists
@@ -39,8 +94,7 @@ class AppManager:
             shutil.rmtree(app_root_path(app_name))
 
         # Create the app package directory
-        if not os.path.exists(APP_PACKAGE_WORK_DIR):
-            os.mkdir(APP_PACKAGE_WORK_DIR)
+        os.makedirs(APP_PACKAGE_WORK_DIR, exist_ok=True)
 
         # Copy the app package template
         self.copy_and_rename_directory(
@@ -49,6 +103,9 @@ class AppManager:
             app_name
         )
 
+    def set_app_name(self, app_name):
+        write_manifest_name(manifest_path(self.state.app_work_name), app_name)
+
     def open_text_file_in_editor(self, filepath):
         if platform.system() == "Windows":
             os.startfile(filepath)
@@ -58,110 +115,171 @@ class AppManager:
             subprocess.run(["xdg-open", filepath])
 
     def copy_and_rename_directory(self, src, dest, new_name):
-        # Copy entire directory recursively
-        shutil.copytree(src, os.path.join(dest, os.path.basename(src)))
-
-        # Determine the old and new full paths
-        old_dir_path = os.path.join(dest, os.path.basename(src))
-        new_dir_path = os.path.join(dest, new_name)
-
-        # Create new directory if it doesn't exist
-        if not os.path.exists(new_dir_path):
-            os.mkdir(new_dir_path)
-
-        # Move each file in old directory to new directory
-        for filename in os.listdir(old_dir_path):
-            shutil.move(os.path.join(old_dir_path, filename), os.path.join(new_dir_path, filename))
-
-        # Remove the old directory
-        shutil.rmtree(old_dir_path)
-
-    def zip_folder(self, folder_path, zip_dest_path):
-        # Check if the folder exists
-        if not os.path.exists(folder_path):
-            print("Source folder does not exist.")
-            return False
-
-        # Create zip file
-        try:
-            shutil.make_archive(zip_dest_path, 'zip', folder_path)
-        except Exception as e:
-            print(f"Could not create zip file. Error: {e}")
-            return False
-
-        print("Folder successfully compressed.")
-        return True
+        # Copy the directory straight to its new name, so packages created at the same time don't share a
+        # temporary copy
+        shutil.copytree(src, os.path.join(dest, new_name))
 
     def register_private_app(self, app_name):
         url = register_private_app_endpoint(self.state.deployment)
 
-        response = requests.post(
-            url=url,
-            auth=auth(self.state.access_key, self.state.access_id),
-            json={'name': app_name}
-        )
+        response = self.api_client.post(url, endpoint="apps", json={'name': app_name})
 
         print(response.json())
 
         return response.json()['uuid']
 
-    def upload_private_app(self, app_name, app_uuid):
+    def upload_private_app(self, app_name, app_uuid, progress: Optional[ProgressCallback] = None):
+        job = self.start_upload(app_name, app_uuid, progress=progress)
+        if not job.done:
+            JobPoller(cancel_event=self.cancel_event).wait_all([job])
+        if job.error:
+            raise job.error
+        return job.success, job.message
+
+    def start_upload(self, app_name, app_uuid, key: Any = None, progress: Optional[ProgressCallback] = None) -> Job:
+        """
+        Upload the exported package of `app_name` and return the upload job without waiting for it. If the
+        upload itself is rejected, the returned job is already done.
+        """
         print("Uploading private app with uuid: " + app_uuid)
         url = upload_private_app_endpoint(self.state.deployment, app_uuid)
         zip_path = app_results_path(app_name) + ".zip"
-        with open(zip_path, 'rb') as file:
-            response = requests.put(
-                url=url,
-                auth=auth(self.state.access_key, self.state.access_id),
-                files={'file': file}
-            )
+        response = self.api_client.upload_file("PUT", url, zip_path, endpoint="apps",
+                                               progress=progress or self.upload_progress_printer(),
+                                               cancel_event=self.cancel_event)
 
-            if response.ok:
-                job_id = response.json()['jobId']
-            else:
-                print(response.json())
-                return
+        if not response.ok:
+            print(response.text)
+            job = Job(key, None, kind="upload")
+            job.finish(success=False, message=f"Upload failed with status code {response.status_code}: "
+                                              f"{response.text}")
+            return job
 
-        status_endpoint = upload_private_app_upload_status_endpoint(self.state.deployment, job_id=job_id)
-        return wait_for_job_completion(
-            lambda: requests.get(status_endpoint, auth=auth(self.state.access_key, self.state.access_id)),
-            success_status="success",
-            failure_status="failed",
-            polling_interval=1,
-            timeout=180
-        )
-
-    def delete_private_app(self, app_uuid):
-        print("Deleting private app with uuid: " + app_uuid)
-        url = delete_private_app_endpoint(self.state.deployment, app_uuid)
-        response = requests.delete(
-            url=url,
-            auth=auth(self.state.access_key, self.state.access_id)
-        )
-        print(response.json())
         job_id = response.json()['jobId']
+        status_endpoint = upload_private_app_upload_status_endpoint(self.state.deployment, job_id=job_id)
+        return Job(key, lambda: self.api_client.get(status_endpoint, endpoint="apps"),
+                   success_status="success", failure_status="failed", timeout=180, kind="upload")
 
-        status_endpoint = delete_private_app_status_endpoint(self.state.deployment, job_id)
-        wait_for_job_completion(
-            lambda: requests.get(status_endpoint, auth=auth(self.state.access_key, self.state.access_id)),
-            success_status="success",
-            failure_status="failed",
-            polling_interval=1,
-            timeout=180
-        )
-        print("App deleted successfully.")
-
-    def test_app(self):
-        app_name = read_name_from_yaml(manifest_path(self.state.app_work_name))
-
-        # Register
-        uuid = self.register_private_app(self.state.app_work_name)
-
-        # Upload
-
-        is_success, message = self.upload_private_app(app_name, uuid)
+    @staticmethod
+    def upload_progress_printer() -> ProgressCallback:
+        last_decile = -1
 
-        self.delete_private_app(uuid)
+        # one line per 10%, the package is sent in many small chunks
+        def print_progress(sent: int, total: int) -> None:
+            nonlocal last_decile
+            decile = 10 * sent // total
+            if decile != last_decile:
+                last_decile = decile
+                print(f"Uploaded {sent} of {total} bytes ({10 * decile}%)")
 
-        return is_success, message
+        return print_progress
 
+    def delete_private_app(self, app_uuid):
+        with get_tracer().span("delete_app", OPERATION, uuid=app_uuid):
+            print("Deleting private app with uuid: " + app_uuid)
+            url = delete_private_app_endpoint(self.state.deployment, app_uuid)
+            response = self.api_client.delete(url, endpoint="apps")
+            print(response.json())
+            job_id = response.json()['jobId']
+
+            status_endpoint = delete_private_app_status_endpoint(self.state.deployment, job_id)
+            wait_for_job_completion(
+                lambda: self.api_client.get(status_endpoint, endpoint="apps"),
+                success_status="success",
+                failure_status="failed",
+                timeout=180,
+                kind="delete"
+            )
+            print("App deleted successfully.")
+
+    def delete_private_app_in_background(self, app_uuid):
+        """
+        Delete the app on a background thread. Use `wait_for_cleanups` to wait until all deletions are done.
+        """
+        def delete():
+            try:
+                self.delete_private_app(app_uuid)
+            except Exception as e:
+                print(f"Error: Could not delete private app {app_uuid}: {e}")
+
+        with self._cleanup_lock:
+            self.pending_cleanups = [future for future in self.pending_cleanups if not future.done()]
+            self.pending_cleanups.append(self.cleanup_executor.submit(delete))
+
+    def wait_for_cleanups(self):
+        with self._cleanup_lock:
+            pending_cleanups, self.pending_cleanups = self.pending_cleanups, []
+        if pending_cleanups:
+            print(f"Waiting for {len(pending_cleanups)} test apps to be deleted...")
+        for future in pending_cleanups:
+            future.result()
+
+    def close(self):
+        """
+        Wait for the background deletions and release the API connections.
+        """
+        self.wait_for_cleanups()
+        self.cleanup_executor.shutdown()
+        self.api_client.close()
+
+    def test_app(self, progress: Optional[ProgressCallback] = None):
+        return self.test_apps([self.state.app_work_name], progress)[0]
+
+    def test_apps(self, app_work_names: List[str], progress: Optional[ProgressCallback] = None,
+                  on_result: Optional[Callable[[int, bool, str], None]] = None) -> List[Tuple[bool, str]]:
+        """
+        Validate the exported packages of `app_work_names` by uploading them as private apps.
+
+        All apps are registered and uploaded (up to `MAX_PARALLEL_UPLOADS` at a time), then their upload jobs are
+        polled together by one `JobPoller`. The result of an app is available as soon as its upload job is done;
+        the app is then deleted in the background, see `wait_for_cleanups`.
+
+        :param on_result: called with the index, success and message of every app as soon as it is validated
+        :return: (success, message) of every app, in the order of `app_work_names`
+        """
+        results: List[Optional[Tuple[bool, str]]] = [None] * len(app_work_names)
+        uuids = {}
+
+        def start(index):
+            app_work_name = app_work_names[index]
+            app_name = read_name_from_yaml(manifest_path(app_work_name))
+            with get_tracer().span("register_and_upload", OPERATION, app=app_work_name):
+                uuids[index] = self.register_private_app(app_work_name)
+                return self.start_upload(app_name, uuids[index], key=index, progress=progress)
+
+        def finish(index, success, message):
+            results[index] = (success, message)
+            if index in uuids:
+                self.delete_private_app_in_background(uuids.pop(index))
+            if on_result:
+                on_result(index, success, message)
+
+        with get_tracer().span("test", OPERATION, apps=len(app_work_names)):
+            try:
+                jobs = []
+                workers = min(MAX_PARALLEL_UPLOADS, len(app_work_names) or 1)
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(start, index) for index in range(len(app_work_names))]
+                    for index, future in enumerate(futures):
+                        try:
+                            jobs.append(future.result())
+                        except Exception as e:
+                            finish(index, False, f"Could not upload {app_work_names[index]}: {e}")
+
+                # the uploads that were rejected right away
+                for job in jobs:
+                    if job.done:
+                        finish(job.key, job.success, job.message)
+
+                pending_jobs = [job for job in jobs if not job.done]
+                for job in JobPoller(cancel_event=self.cancel_event).as_completed(pending_jobs):
+                    if job.error:
+                        finish(job.key, False, str(job.error))
+                    else:
+                        finish(job.key, job.success, job.message)
+            finally:
+                # registered apps are deleted even if the test was cancelled
+                for index in list(uuids):
+                    self.delete_private_app_in_background(uuids.pop(index))
+
+        return results
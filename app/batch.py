@@ -0,0 +1,268 @@
+import csv
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.app_manager import AppManager
+from app.common import app_root_path, slugify_name
+from app.state import State
+
+ACCOUNTS_PATH = "accounts.json"
+BATCH_FIELDS = ("account", "folder_id", "app_name")
+STEPS = ("import", "export", "test")
+# steps that talk to the API and need the account's credentials
+ACCOUNT_STEPS = ("import", "test")
+
+DEFAULT_BATCH_WORKERS = 4
+DEFAULT_DEPLOYMENT_CONCURRENCY = 2
+
+
+class BatchEntry:
+    def __init__(self, account: Optional[str], folder_id: Optional[str], app_name: str):
+        self.account = account
+        self.folder_id = folder_id
+        self.app_name = app_name
+
+    def __repr__(self):
+        return f"BatchEntry(account={self.account}, folder_id={self.folder_id}, app_name={self.app_name})"
+
+    @property
+    def work_name(self) -> str:
+        """
+        Name of the app's folder in tmp/. It only depends on the app name, so incremental imports of the next run
+        find the previous import.
+        """
+        return slugify_name(self.app_name)
+
+
+class AppResult:
+    def __init__(self, entry: BatchEntry):
+        self.entry = entry
+        self.deployment = None
+        self.success = False
+        self.error = None
+        self.failed_step = None
+        self.test_message = None
+        self.archive_path = None
+        # step -> seconds
+        self.timings: Dict[str, float] = {}
+        self.duration = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "account": self.entry.account,
+            "folder_id": self.entry.folder_id,
+            "app_name": self.entry.app_name,
+            "deployment": self.deployment,
+            "status": "success" if self.success else "failed",
+            "failed_step": self.failed_step,
+            "error": self.error,
+            "test_message": self.test_message,
+            "archive": self.archive_path,
+            "timings": self.timings,
+            "duration": round(self.duration, 3),
+        }
+
+
+def load_batch_file(path: str) -> List[BatchEntry]:
+    """
+    Read (account, folder_id, app_name) entries from a JSON list of objects or from a CSV file with a header row.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        if path.lower().endswith(".json"):
+            rows = json.load(file)
+        else:
+            rows = list(csv.DictReader(file))
+
+    entries = []
+    for index, row in enumerate(rows, start=1):
+        missing = [field for field in BATCH_FIELDS if not str(row.get(field) or "").strip()]
+        if missing:
+            raise ValueError(f"Entry {index} of {path} is missing {', '.join(missing)}")
+        entries.append(BatchEntry(*(str(row[field]).strip() for field in BATCH_FIELDS)))
+
+    work_names = [entry.work_name for entry in entries]
+    duplicates = sorted({name for name in work_names if work_names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"{path} contains the same app more than once: {', '.join(duplicates)}")
+    return entries
+
+
+def load_accounts(path: str = ACCOUNTS_PATH) -> Dict[str, Dict[str, str]]:
+    """
+    Accounts saved by the login view, keyed by name.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as file:
+        return {account['name']: account for account in json.load(file)}
+
+
+class BatchRunner:
+    """
+    Imports, exports and tests apps without the GUI.
+
+    Apps are processed by a pool of `workers` threads, and at most `deployment_concurrency` apps of the same
+    deployment are processed at once, so a large batch doesn't flood a single deployment with requests. Every app
+    gets its own `State` and `AppManager` created by `app_manager_factory`. A failing app doesn't stop the others;
+    its error is reported in the summary.
+    """
+
+    def __init__(self, app_manager_factory: Callable[[State], AppManager], accounts: Dict[str, Dict[str, str]],
+                 steps: Sequence[str] = ("import", "export"), workers: int = DEFAULT_BATCH_WORKERS,
+                 deployment_concurrency: int = DEFAULT_DEPLOYMENT_CONCURRENCY, incremental: bool = False):
+        unknown_steps = [step for step in steps if step not in STEPS]
+        if unknown_steps:
+            raise ValueError(f"Unknown steps: {', '.join(unknown_steps)}")
+        self.app_manager_factory = app_manager_factory
+        self.accounts = accounts
+        # steps always run in the order of STEPS
+        self.steps = [step for step in STEPS if step in steps]
+        self.workers = workers
+        self.deployment_concurrency = deployment_concurrency
+        self.incremental = incremental
+        self._deployment_semaphores: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    def run(self, entries: List[BatchEntry]) -> List[AppResult]:
+        """
+        Process all entries and return their results in the order of `entries`.
+
+        The apps are imported and exported first. Then the apps that made it are tested, the apps of an account
+        together, so their uploads are validated side by side (see `AppManager.test_apps`).
+        """
+        if not entries:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(entries))) as executor:
+            results = list(executor.map(self.run_entry, entries))
+
+            if "test" in self.steps:
+                accounts: Dict[str, List[AppResult]] = {}
+                for result in results:
+                    if result.success:
+                        accounts.setdefault(result.entry.account, []).append(result)
+                list(executor.map(self.run_tests, accounts.values()))
+
+        for result in results:
+            status = "succeeded" if result.success else "failed"
+            print(f"{result.entry.app_name} {status} in {result.duration:.1f}s")
+        return results
+
+    def run_entry(self, entry: BatchEntry) -> AppResult:
+        """
+        Run the steps of `entry` except for the test, see `run_tests`.
+        """
+        result = AppResult(entry)
+        started_at = time.monotonic()
+        try:
+            state = self.create_state(entry, result)
+            app_manager = self.app_manager_factory(state)
+            try:
+                with self._deployment_semaphore(result.deployment):
+                    for step in self.steps:
+                        if step == "test":
+                            continue
+                        result.failed_step = step
+                        step_started_at = time.monotonic()
+                        getattr(self, f"run_{step}")(app_manager, entry, result)
+                        result.timings[step] = round(time.monotonic() - step_started_at, 3)
+                result.failed_step = None
+                result.success = True
+            finally:
+                app_manager.close()
+        except Exception as e:
+            self.fail(result, e)
+            traceback.print_exc()
+
+        result.duration = time.monotonic() - started_at
+        return result
+
+    def run_tests(self, results: List[AppResult]) -> None:
+        """
+        Test the apps of `results`, which all belong to the same account, with a single `AppManager`.
+        """
+        started_at = time.monotonic()
+        try:
+            state = self.create_state(results[0].entry, results[0])
+            app_manager = self.app_manager_factory(state)
+        except Exception as e:
+            for result in results:
+                result.failed_step = "test"
+                self.fail(result, e)
+            return
+
+        def record(index: int, success: bool, message: str) -> None:
+            result = results[index]
+            result.deployment = state.deployment
+            result.test_message = message
+            result.timings["test"] = round(time.monotonic() - started_at, 3)
+            result.duration += time.monotonic() - started_at
+            if not success:
+                result.failed_step = "test"
+                self.fail(result, ValueError(f"Validation failed: {message}"))
+
+        try:
+            with self._deployment_semaphore(state.deployment):
+                app_manager.test_apps([result.entry.work_name for result in results], on_result=record)
+        except Exception as e:
+            for result in results:
+                if "test" not in result.timings:
+                    result.failed_step = "test"
+                    result.duration += time.monotonic() - started_at
+                    self.fail(result, e)
+            traceback.print_exc()
+        finally:
+            app_manager.close()
+
+    def create_state(self, entry: BatchEntry, result: AppResult) -> State:
+        state = State()
+        state.app_work_name = entry.work_name
+        if any(step in ACCOUNT_STEPS for step in self.steps):
+            account = self.accounts.get(entry.account)
+            if account is None:
+                raise ValueError(f"Unknown account {entry.account}, save it in {ACCOUNTS_PATH} first")
+            state.log_in(account['name'], account['deployment'], account['access_key'], account['access_id'])
+            result.deployment = account['deployment']
+        return state
+
+    @staticmethod
+    def fail(result: AppResult, error: Exception) -> None:
+        result.success = False
+        result.error = str(error) or type(error).__name__
+        print(f"Error: {result.entry.app_name} failed in step {result.failed_step}: {result.error}")
+
+    def run_import(self, app_manager: AppManager, entry: BatchEntry, result: AppResult) -> None:
+        # an incremental import reuses the screenshots of the existing package
+        if not (self.incremental and os.path.exists(app_root_path(entry.work_name))):
+            app_manager.create_new_app_package(entry.work_name)
+        app_manager.set_app_name(entry.app_name)
+        app_manager.import_resources(entry.folder_id, self.incremental)
+
+    def run_export(self, app_manager: AppManager, entry: BatchEntry, result: AppResult) -> None:
+        if not os.path.exists(app_root_path(entry.work_name)):
+            raise ValueError(f"{entry.app_name} hasn't been imported yet")
+        result.archive_path = app_manager.save_and_export()
+
+    def _deployment_semaphore(self, deployment: Optional[str]) -> threading.Semaphore:
+        with self._lock:
+            if deployment not in self._deployment_semaphores:
+                self._deployment_semaphores[deployment] = threading.Semaphore(self.deployment_concurrency)
+            return self._deployment_semaphores[deployment]
+
+
+def write_summary(path: str, results: List[AppResult], steps: Sequence[str], duration: float) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({
+            "steps": list(steps),
+            "duration": round(duration, 3),
+            "succeeded": sum(1 for result in results if result.success),
+            "failed": sum(1 for result in results if not result.success),
+            "apps": [result.to_dict() for result in results],
+        }, file, indent=2)
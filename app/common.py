@@ -1,22 +1,37 @@
 import time
-import zipfile
 from typing import Optional, Union, Tuple
 import re
 import random
 import os
 import shutil
 import string
+import threading
 import time
 from typing import Callable, Any
 import requests
 import yaml
 from requests.auth import HTTPBasicAuth
 
+from app.job_poller import Job, JobPoller, OperationCancelled
+
 # Constants for various paths and directories
 APP_PACKAGE_TEMPLATE_PATH = "templates/app-package-template"
 APP_PACKAGE_WORK_DIR = "tmp"
 APP_PACKAGE_RESULTS_DIR = "results"
 
+# Maximum number of API requests issued in parallel while crawling content
+DEFAULT_MAX_CONCURRENT_REQUESTS = 8
+
+# Number of dashboards imported by a single terraformer process
+DEFAULT_TERRAFORMER_SHARD_SIZE = 20
+
+# Seconds after which a terraformer process is terminated
+DEFAULT_TERRAFORMER_TIMEOUT = 1800
+
+# Environment variable that points the tool and terraformer at another API server, e.g. the mock server of the
+# benchmarks
+API_BASE_URL_VARIABLE = "SUMO_API_BASE_URL"
+
 
 def app_root_path(app_name: str) -> str:
     return os.path.join(APP_PACKAGE_WORK_DIR, app_name)
@@ -26,6 +41,11 @@ def app_results_path(app_name: str) -> str:
     return os.path.join(APP_PACKAGE_RESULTS_DIR, app_name)
 
 
+def export_manifest_path(app_name: str) -> str:
+    # hashes of the files in the exported package, see Packager
+    return f"{app_results_path(app_name)}.zip.manifest.json"
+
+
 def manifest_path(app_name: str) -> str:
     return os.path.join(app_root_path(app_name), "manifest.yaml")
 
@@ -34,6 +54,11 @@ def config_path(app_name: str) -> str:
     return os.path.join(app_root_path(app_name), "config.yaml")
 
 
+def import_state_path(app_name: str) -> str:
+    # kept next to the app folder so that it doesn't end up in the exported package
+    return os.path.join(APP_PACKAGE_WORK_DIR, f"{app_name}.import-state.json")
+
+
 def changelog_path(app_name: str) -> str:
     return os.path.join(app_root_path(app_name), "CHANGELOG.md")
 
@@ -55,6 +80,9 @@ def preview_images_path(app_name: str) -> str:
 
 
 def resolve_base_api_url(deployment: str) -> str:
+    base_url = os.environ.get(API_BASE_URL_VARIABLE)
+    if base_url:
+        return base_url.rstrip("/") + "/"
     return f"https://{deployment}-api.sumologic.net/api/"
 
 
@@ -66,6 +94,10 @@ def get_dashboards_url(deployment: str) -> str:
     return f"{resolve_base_api_url(deployment)}v2/dashboards/"
 
 
+def get_dashboard_url(deployment: str, dashboard_id: str) -> str:
+    return f"{resolve_base_api_url(deployment)}v2/dashboards/{dashboard_id}"
+
+
 def export_content_url(deployment: str, content_id: str) -> str:
     return f"{resolve_base_api_url(deployment)}v2/content/{content_id}/export"
 
@@ -82,6 +114,10 @@ def download_screenshot_endpoint(deployment: str) -> str:
     return f"{resolve_base_api_url(deployment)}v2/dashboards/reportJobs"
 
 
+def download_screenshot_status_endpoint(deployment: str, job_id: str) -> str:
+    return f"{resolve_base_api_url(deployment)}v2/dashboards/reportJobs/{job_id}/status"
+
+
 def download_screenshot_result_endpoint(deployment: str, job_id: str) -> str:
     return f"{resolve_base_api_url(deployment)}v2/dashboards/reportJobs/{job_id}/result"
 
@@ -143,19 +179,6 @@ def format_hex(input_str: str) -> str:
     return hex_str.zfill(16)
 
 
-def zip_folder(folder_path: str, zip_path: str) -> str:
-    if not os.path.exists(folder_path):
-        return "Folder does not exist"
-
-    # Get the parent directory and the folder name of the folder to be zipped
-    parent_dir, folder_name = os.path.split(folder_path)
-
-    # Create the zip file containing only the root folder inside it
-    shutil.make_archive(zip_path, 'zip', root_dir=parent_dir, base_dir=folder_name)
-
-    return f"Folder zipped as {zip_path}.zip"
-
-
 def read_name_from_yaml(file_path: str) -> Optional[str]:
     try:
         with open(file_path, 'r') as file:
@@ -170,8 +193,10 @@ def wait_for_job_completion(
         get_status: Callable[[], Any],
         success_status: str = "success",
         failure_status: str = "failed",
-        polling_interval: int = 1,
-        timeout: int = 180
+        polling_interval: float = 5,
+        timeout: int = 180,
+        kind: str = "job",
+        cancel_event: Optional[threading.Event] = None
 ) -> Tuple[bool, str]:
     """
     Wait for an asynchronous job to complete.
@@ -179,26 +204,16 @@ def wait_for_job_completion(
     :param get_status: a callable that fetches the job status
     :param success_status: the status string that indicates job completion
     :param failure_status: the status string that indicates job failure
-    :param polling_interval: how often to poll for the job status (in seconds)
+    :param polling_interval: the longest time to wait between two polls (in seconds), see `JobPoller`
     :param timeout: how long to wait for the job to complete before timing out (in seconds)
+    :param kind: the kind of job, e.g. "upload" or "delete"
+    :param cancel_event: stops waiting with `OperationCancelled` when set
     """
-    start_time = time.time()
-    while True:
-        if time.time() - start_time > timeout:
-            raise Exception("Job timed out.")
-
-        try:
-            response = get_status()
-            status = response.json()["status"].lower()
-
-            if status == success_status:
-                return True, "success"
-            elif status == failure_status:
-                return False, response.json().get('error', {}).get('message', 'No message')
-
-            time.sleep(polling_interval)
-        except Exception as e:
-            raise Exception(f"Encountered an error while waiting for job completion: {e}")
+    job = Job(None, get_status, success_status, failure_status, timeout, kind)
+    JobPoller(max_delay=polling_interval, cancel_event=cancel_event).wait_all([job])
+    if job.error:
+        raise job.error
+    return job.success, job.message
 
 
 def cleanup_temporary_folders():
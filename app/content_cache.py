@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from typing import Any, Optional
+
+DEFAULT_CACHE_DIR = "cache"
+DEFAULT_CACHE_SIZE_BYTES = 512 * 1024 * 1024
+
+
+class ContentCache:
+    """
+    On-disk cache of exported content.
+
+    Entries are keyed by a namespace (e.g. "searches"), the content id and the version of the content item
+    (`modifiedAt` from the folder listing), so an edited item is never served from the cache. Each entry is a single
+    file; reading an entry refreshes its modification time, and once the cache grows over `max_size_bytes` the least
+    recently used entries are removed. A disabled cache never stores or returns anything.
+
+    Imports look up saved searches, dashboards and screenshots with the versions of the current folder listing, so
+    "cached" content is always content whose version hasn't changed since it was stored.
+    """
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR, max_size_bytes: int = DEFAULT_CACHE_SIZE_BYTES,
+                 enabled: bool = True):
+        self.root = root
+        self.max_size_bytes = max_size_bytes
+        self.enabled = enabled
+        self._size = None
+        self._lock = threading.Lock()
+
+    def get_json(self, namespace: str, content_id: str, version: Optional[str]) -> Optional[Any]:
+        path = self._lookup(namespace, content_id, version)
+        if path is None:
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def put_json(self, namespace: str, content_id: str, version: Optional[str], value: Any) -> None:
+        if self._entry_path(namespace, content_id, version) is None:
+            return
+        self._store(namespace, content_id, version,
+                    lambda file: file.write(json.dumps(value).encode('utf-8')))
+
+    def get_file(self, namespace: str, content_id: str, version: Optional[str], target_path: str) -> bool:
+        """
+        Copy the cached file to `target_path`. Returns False if there is no such entry.
+        """
+        path = self._lookup(namespace, content_id, version)
+        if path is None:
+            return False
+        try:
+            shutil.copyfile(path, target_path)
+        except OSError:
+            return False
+        return True
+
+    def put_file(self, namespace: str, content_id: str, version: Optional[str], source_path: str) -> None:
+        if self._entry_path(namespace, content_id, version) is None:
+            return
+
+        def copy(file):
+            with open(source_path, 'rb') as source:
+                shutil.copyfileobj(source, file)
+
+        self._store(namespace, content_id, version, copy)
+
+    def clear(self) -> None:
+        with self._lock:
+            if os.path.exists(self.root):
+                shutil.rmtree(self.root)
+            self._size = 0
+
+    def _entry_path(self, namespace: str, content_id: str, version: Optional[str]) -> Optional[str]:
+        if not self.enabled or not content_id or not version:
+            return None
+        key = hashlib.sha256(f"{content_id}:{version}".encode('utf-8')).hexdigest()
+        return os.path.join(self.root, namespace, key)
+
+    def _lookup(self, namespace: str, content_id: str, version: Optional[str]) -> Optional[str]:
+        path = self._entry_path(namespace, content_id, version)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            # the modification time is the last access time used for eviction
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def _store(self, namespace: str, content_id: str, version: Optional[str], write) -> None:
+        path = self._entry_path(namespace, content_id, version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                write(file)
+            entry_size = os.path.getsize(temp_path)
+            previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._disk_usage()
+            else:
+                self._size += entry_size - previous_size
+            if self._size > self.max_size_bytes:
+                self._evict()
+
+    def _entries(self):
+        for directory, _, file_names in os.walk(self.root):
+            for file_name in file_names:
+                if file_name.startswith(".tmp-"):
+                    continue
+                path = os.path.join(directory, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _disk_usage(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self._size = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self._size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
@@ -0,0 +1,62 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.folder_index import FolderIndex
+
+# fields of a content item that change whenever the item is modified
+CONTENT_VERSION_FIELDS = ("modifiedAt", "version")
+
+
+def content_version(item: Dict[str, Any]) -> Optional[str]:
+    for field in CONTENT_VERSION_FIELDS:
+        if item.get(field):
+            return str(item[field])
+    return None
+
+
+class ContentSnapshot:
+    """
+    Content of an app folder as seen at the start of an import.
+
+    The folder tree is crawled and the dashboards are resolved once per import; every later stage (Terraform
+    generation, outputs, screenshots) reads from the snapshot instead of querying the API again.
+    """
+
+    def __init__(self, app_folder_id: str, folders: Dict[str, Dict[str, Any]], content: List[Dict[str, Any]],
+                 dashboards: List[Dict[str, Any]]):
+        self.app_folder_id = app_folder_id
+        self.folders = folders
+        self.content = content
+        self.dashboards = dashboards
+        self.folder_index = FolderIndex(folders, app_folder_id)
+
+    def __repr__(self):
+        return (f"ContentSnapshot(app_folder_id={self.app_folder_id}, folders={len(self.folders)}, "
+                f"content={len(self.content)}, dashboards={len(self.dashboards)})")
+
+    @staticmethod
+    def filter_dashboards(content_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [item for item in content_list if item['itemType'] == 'Dashboard']
+
+    @property
+    def versions(self) -> Dict[str, Optional[str]]:
+        """
+        Version of every content item, keyed by the content id.
+        """
+        return {item["id"]: content_version(item) for item in self.content}
+
+    @property
+    def dashboard_ids(self) -> List[str]:
+        return [dashboard["id"] for dashboard in self.dashboards]
+
+    @property
+    def saved_searches(self) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        (folder, saved search content item) pairs, in folder order.
+        """
+        saved_searches = []
+        for folder in self.folders.values():
+            if folder['children']:
+                for child in folder['children']:
+                    if child['itemType'] == "Search":
+                        saved_searches.append((folder, child))
+        return saved_searches
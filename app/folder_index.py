@@ -0,0 +1,58 @@
+from typing import Any, Dict
+
+from app.common import slugify
+
+# Terraform name of the app folder itself
+ROOT_FOLDER_NAME = "integration"
+
+
+class FolderIndex:
+    """
+    Terraform names of the folders of an app, computed once from the crawled folder tree.
+
+    Every folder is named after the slug of its display name; the app folder is always `integration`. Folders
+    whose slugs collide get a numeric suffix, so every folder id maps to exactly one `sumologic_folder` resource.
+    """
+
+    def __init__(self, folders: Dict[str, Dict[str, Any]], app_folder_id: str):
+        self.app_folder_id = app_folder_id
+        self._names: Dict[str, str] = {app_folder_id: ROOT_FOLDER_NAME}
+        used_names = {ROOT_FOLDER_NAME}
+        for folder_id, folder in folders.items():
+            if folder_id == app_folder_id:
+                continue
+            base_name = slugify(str(folder["name"]), "_")
+            # Terraform names must start with a letter
+            if not base_name[:1].isalpha():
+                base_name = f"folder_{base_name}".rstrip("_")
+            name = base_name
+            suffix = 2
+            while name in used_names:
+                name = f"{base_name}_{suffix}"
+                suffix += 1
+            if name != base_name:
+                print(f"Warning: Folder \"{folder['name']}\" ({folder_id}) is named {name} in Terraform, "
+                      f"{base_name} is already taken")
+            used_names.add(name)
+            self._names[folder_id] = name
+
+    def __contains__(self, folder_id: str) -> bool:
+        return folder_id in self._names
+
+    def is_root(self, folder_id: str) -> bool:
+        return folder_id == self.app_folder_id
+
+    def name(self, folder_id: str) -> str:
+        """
+        Slug of the folder, used in the names of its resource and variables.
+        """
+        return self._names[folder_id]
+
+    def resource_name(self, folder_id: str) -> str:
+        return f"{self._names[folder_id]}_folder"
+
+    def reference(self, folder_id: str) -> str:
+        """
+        Terraform expression of the folder's id, e.g. `sumologic_folder.integration_folder.id`.
+        """
+        return f"sumologic_folder.{self.resource_name(folder_id)}.id"
@@ -0,0 +1,174 @@
+import os
+from contextlib import contextmanager
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+
+from app.resource_registry import ResourceRegistry
+
+HCL_ESCAPES = {
+    "\\": "\\\\",
+    "\"": "\\\"",
+    "\n": "\\n",
+    "\r": "\\r",
+    "\t": "\\t",
+}
+
+
+def hcl_string(value) -> str:
+    """
+    Render `value` as a quoted HCL string literal. Besides quotes, backslashes and control characters, template
+    sequences (`${`, `%{`) are escaped, so the value is never interpolated by Terraform.
+    """
+    text = "".join(HCL_ESCAPES.get(char, char) for char in str(value))
+    return '"' + text.replace("${", "$${").replace("%{", "%%{") + '"'
+
+
+def hcl_bool(value) -> str:
+    return "true" if value else "false"
+
+
+class HclWriter:
+    """
+    Writes HCL blocks straight to a file handle.
+
+    Only the attributes of the block that is currently being written are held in memory, to align their `=` signs
+    the way `terraform fmt` does, so generating a file takes constant memory however many blocks it has. Resource
+    blocks are added to `registry`, if one is given.
+
+        with writer.block("resource", "sumologic_folder", "integration_folder"):
+            writer.attribute("name", "var.integration_name")
+            writer.string("description", "Integration folder")
+    """
+
+    def __init__(self, file: IO[str], registry: Optional[ResourceRegistry] = None, indent: str = "  "):
+        self.file = file
+        self.registry = registry
+        self.indent = indent
+        self.depth = 0
+        self._attributes: List[Tuple[str, str]] = []
+
+    @contextmanager
+    def block(self, block_type: str, *labels: str) -> Iterator["HclWriter"]:
+        self._flush_attributes()
+        if block_type == "resource" and self.registry is not None:
+            self.registry.add(*labels)
+        header = " ".join([block_type] + [hcl_string(label) for label in labels])
+        self._write_line(f"{header} {{")
+        self.depth += 1
+        yield self
+        self._flush_attributes()
+        self.depth -= 1
+        self._write_line("}")
+
+    def attribute(self, name: str, expression: str) -> None:
+        """
+        Write `name = expression`, with `expression` written verbatim.
+        """
+        self._attributes.append((name, expression))
+
+    def string(self, name: str, value) -> None:
+        self.attribute(name, hcl_string(value))
+
+    def blank_line(self) -> None:
+        self._flush_attributes()
+        self.file.write("\n")
+
+    @contextmanager
+    def list_attribute(self, name: str) -> Iterator["HclWriter"]:
+        """
+        Write a multi-line list. Items are added with `object_item`; every item is followed by a comma, which
+        HCL allows after the last item too.
+        """
+        self._flush_attributes()
+        self._write_line(f"{name} = [")
+        self.depth += 1
+        yield self
+        self.depth -= 1
+        self._write_line("]")
+
+    def object_item(self, **attributes: str) -> None:
+        self._write_line("{")
+        self.depth += 1
+        self._write_attributes([(hcl_string(key), expression) for key, expression in attributes.items()], ",")
+        self.depth -= 1
+        self._write_line("},")
+
+    def string_item(self, value) -> None:
+        self._write_line(f"{hcl_string(value)},")
+
+    def _flush_attributes(self) -> None:
+        if self._attributes:
+            self._write_attributes(self._attributes)
+            self._attributes = []
+
+    def _write_attributes(self, attributes: List[Tuple[str, str]], suffix: str = "") -> None:
+        width = max(len(name) for name, _ in attributes)
+        for name, expression in attributes:
+            self._write_line(f"{name.ljust(width)} = {expression}{suffix}")
+
+    def _write_line(self, text: str) -> None:
+        self.file.write(f"{self.indent * self.depth}{text}\n")
+
+
+class LazyFile:
+    """
+    Text file that is only created once something is written to it, so generators that turn out to have nothing
+    to write don't leave empty files behind.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    @property
+    def created(self) -> bool:
+        return self._file is not None
+
+    def write(self, text: str) -> int:
+        if self._file is None:
+            self._file = open(self.path, 'w', encoding='utf-8')
+        return self._file.write(text)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> "LazyFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class StagedFiles:
+    """
+    Replaces a set of files all at once. New content is written to the staged path of each file (see `path`), and
+    `commit` moves every staged file over its final path, or removes the final file if nothing was staged for it.
+    Staged files that weren't committed are removed when the `with` block exits, so a run that fails or is
+    cancelled leaves the previous files untouched.
+    """
+
+    def __init__(self, paths: Iterable[str]):
+        self._staged_paths = {path: f"{path}.tmp" for path in paths}
+
+    def path(self, path: str) -> str:
+        return self._staged_paths[path]
+
+    def commit(self) -> None:
+        for path, staged_path in self._staged_paths.items():
+            if os.path.exists(staged_path):
+                os.replace(staged_path, path)
+            elif os.path.exists(path):
+                os.remove(path)
+
+    def discard(self) -> None:
+        for staged_path in self._staged_paths.values():
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
+
+    def __enter__(self) -> "StagedFiles":
+        # leftovers of a run that was killed must not be committed
+        self.discard()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.discard()
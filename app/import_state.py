@@ -0,0 +1,124 @@
+import json
+import os
+from typing import Any, Dict, Iterable, Optional
+
+from app.content_snapshot import ContentSnapshot
+
+
+class ImportState:
+    """
+    What the last import of an app produced from each content item.
+
+    For every saved search the exported JSON is kept, and for every dashboard the raw resource block generated by
+    terraformer and the location of its screenshot, all together with the version of the content item they were
+    produced from. An incremental import reuses everything whose version didn't change and only exports,
+    terraformizes and screenshots the items that were added or modified.
+    """
+
+    def __init__(self, app_folder_id: str, deployment: str, searches: Optional[Dict[str, Dict[str, Any]]] = None,
+                 dashboards: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.app_folder_id = app_folder_id
+        self.deployment = deployment
+        # search content id -> {"version", "json"}
+        self.searches = searches or {}
+        # dashboard content id -> {"version", "dashboard_id", "block", "screenshot", "screenshot_outdated"}
+        self.dashboards = dashboards or {}
+
+    @classmethod
+    def load(cls, path: str) -> Optional["ImportState"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            return cls(data["app_folder_id"], data["deployment"], data["searches"], data["dashboards"])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable import state {path}: {e}")
+            return None
+
+    def save(self, path: str) -> None:
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump({
+                "app_folder_id": self.app_folder_id,
+                "deployment": self.deployment,
+                "searches": self.searches,
+                "dashboards": self.dashboards,
+            }, file)
+        os.replace(temp_path, path)
+
+    def matches(self, app_folder_id: str, deployment: str) -> bool:
+        return self.app_folder_id == app_folder_id and self.deployment == deployment
+
+    @staticmethod
+    def _is_unchanged(entry: Optional[Dict[str, Any]], version: Optional[str]) -> bool:
+        # items without a version can't be compared and are always processed again
+        return entry is not None and version is not None and entry["version"] == version
+
+    def unchanged_search_jsons(self, snapshot: ContentSnapshot) -> Dict[str, Dict[str, Any]]:
+        versions = snapshot.versions
+        return {
+            child["id"]: self.searches[child["id"]]["json"]
+            for _, child in snapshot.saved_searches
+            if self._is_unchanged(self.searches.get(child["id"]), versions.get(child["id"]))
+        }
+
+    def unchanged_dashboard_blocks(self, snapshot: ContentSnapshot) -> Dict[str, str]:
+        """
+        Raw terraformer blocks of dashboards that didn't change, keyed by dashboard id.
+        """
+        versions = snapshot.versions
+        blocks = {}
+        for dashboard in snapshot.dashboards:
+            entry = self.dashboards.get(dashboard["contentId"])
+            if (self._is_unchanged(entry, versions.get(dashboard["contentId"]))
+                    and entry["dashboard_id"] == dashboard["id"] and entry["block"]):
+                blocks[dashboard["id"]] = entry["block"]
+        return blocks
+
+    def unchanged_screenshots(self, snapshot: ContentSnapshot) -> Dict[str, str]:
+        """
+        Screenshot locations of dashboards that didn't change, keyed by dashboard content id.
+        """
+        versions = snapshot.versions
+        screenshots = {}
+        for dashboard in snapshot.dashboards:
+            entry = self.dashboards.get(dashboard["contentId"])
+            if self._is_unchanged(entry, versions.get(dashboard["contentId"])) and entry["screenshot"] \
+                    and not entry.get("screenshot_outdated") and os.path.exists(entry["screenshot"]):
+                screenshots[dashboard["contentId"]] = entry["screenshot"]
+        return screenshots
+
+    def screenshots_of(self, dashboard_content_ids: Iterable[str]) -> Dict[str, str]:
+        return {
+            content_id: self.dashboards[content_id]["screenshot"]
+            for content_id in dashboard_content_ids
+            if content_id in self.dashboards and self.dashboards[content_id]["screenshot"]
+        }
+
+    def record_searches(self, snapshot: ContentSnapshot, search_jsons: Dict[str, Dict[str, Any]]) -> None:
+        versions = snapshot.versions
+        self.searches = {
+            content_id: {"version": versions.get(content_id), "json": search_json}
+            for content_id, search_json in search_jsons.items()
+        }
+
+    def record_dashboards(self, snapshot: ContentSnapshot, blocks: Dict[str, str], screenshots: Dict[str, str],
+                          outdated_screenshots: Iterable[str] = ()) -> None:
+        """
+        :param outdated_screenshots: content ids of dashboards whose screenshot predates their current version
+        """
+        versions = snapshot.versions
+        outdated_screenshots = set(outdated_screenshots)
+        self.dashboards = {}
+        for dashboard in snapshot.dashboards:
+            if dashboard["id"] not in blocks:
+                # terraformer failed for this dashboard, it will be imported again next time
+                continue
+            self.dashboards[dashboard["contentId"]] = {
+                "version": versions.get(dashboard["contentId"]),
+                "dashboard_id": dashboard["id"],
+                "block": blocks[dashboard["id"]],
+                "screenshot": screenshots.get(dashboard["contentId"]),
+                "screenshot_outdated": dashboard["contentId"] in outdated_screenshots,
+            }
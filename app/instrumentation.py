@@ -0,0 +1,206 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+TRACE_FORMATS = ("json", "chrome")
+
+# event categories
+STAGE = "stage"
+OPERATION = "operation"
+HTTP = "http"
+JOB = "job"
+PROCESS = "process"
+
+# numeric event arguments that are added up in the summary
+SUMMED_ARGS = ("bytes_sent", "bytes_received", "polls")
+
+
+class Span:
+    """
+    Times the code in its `with` block and records it as an event of its tracer.
+    """
+
+    def __init__(self, tracer: "Tracer", name: str, category: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.started_at = None
+
+    def __enter__(self) -> "Span":
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add_event(self.name, self.category, self.started_at, time.perf_counter() - self.started_at,
+                              **self.args)
+        return False
+
+
+class NullSpan:
+    def __enter__(self) -> "NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    """
+    Records timed events (stages of an import, app operations, HTTP requests, job polling, subprocesses) of all
+    threads and writes them as a JSON summary or as a Chrome trace (chrome://tracing, https://ui.perfetto.dev).
+
+    A disabled tracer records nothing, its spans cost a single attribute check.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.started_at = time.perf_counter()
+        self.started_at_wall_time = time.time()
+        self.events: List[Dict[str, Any]] = []
+        self._thread_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, category: str = STAGE, **args):
+        """
+        Context manager recording the time spent in its block as a `category` event called `name`.
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, category, args)
+
+    def add_event(self, name: str, category: str, started_at: float, duration: float, **args) -> None:
+        """
+        Record an event that started at `started_at` (a `time.perf_counter` value) and took `duration` seconds.
+        """
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        with self._lock:
+            self._thread_names.setdefault(thread.ident, thread.name)
+            self.events.append({"name": name, "category": category, "start": started_at - self.started_at,
+                                "duration": duration, "thread": thread.ident, "args": args})
+
+    def record_http(self, endpoint: str, method: str, url: str, started_at: float, duration: float,
+                    status_code: Optional[int], bytes_sent: int, bytes_received: int,
+                    error: Optional[str] = None) -> None:
+        args = {"method": method, "url": url, "status_code": status_code, "bytes_sent": bytes_sent,
+                "bytes_received": bytes_received}
+        if error:
+            args["error"] = error
+        self.add_event(endpoint, HTTP, started_at, duration, **args)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Count, total, mean, median, 95th percentile and maximum duration of the events of every category and
+        name, plus the totals of their numeric arguments (bytes, polls) and the status codes of HTTP requests.
+        """
+        with self._lock:
+            events = list(self.events)
+
+        groups: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        for event in events:
+            groups.setdefault(event["category"], {}).setdefault(event["name"], []).append(event)
+
+        summary = {}
+        for category, names in sorted(groups.items()):
+            summary[category] = {}
+            for name, named_events in sorted(names.items()):
+                durations = sorted(event["duration"] for event in named_events)
+                entry = {
+                    "count": len(durations),
+                    "total": round(sum(durations), 6),
+                    "mean": round(sum(durations) / len(durations), 6),
+                    "p50": round(self.percentile(durations, 0.5), 6),
+                    "p95": round(self.percentile(durations, 0.95), 6),
+                    "max": round(durations[-1], 6),
+                }
+                errors = sum(1 for event in named_events if event["args"].get("error"))
+                if errors:
+                    entry["errors"] = errors
+                for arg in SUMMED_ARGS:
+                    values = [event["args"][arg] for event in named_events if arg in event["args"]]
+                    if values:
+                        entry[arg] = sum(values)
+                if category == HTTP:
+                    status_codes: Dict[str, int] = {}
+                    for event in named_events:
+                        status_code = str(event["args"].get("status_code"))
+                        status_codes[status_code] = status_codes.get(status_code, 0) + 1
+                    entry["status_codes"] = status_codes
+                summary[category][name] = entry
+        return summary
+
+    @staticmethod
+    def percentile(sorted_values: List[float], fraction: float) -> float:
+        return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+    def to_json(self) -> Dict[str, Any]:
+        with self._lock:
+            events = [dict(event, thread=self._thread_names.get(event["thread"], str(event["thread"])))
+                      for event in self.events]
+        return {
+            "started_at": self.started_at_wall_time,
+            "duration": time.perf_counter() - self.started_at,
+            "summary": self.summary(),
+            "events": sorted(events, key=lambda event: event["start"]),
+        }
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        Trace Event Format: every event is a complete ("X") event in microseconds on the thread that recorded it.
+        """
+        process_id = os.getpid()
+        with self._lock:
+            events = list(self.events)
+            thread_names = dict(self._thread_names)
+        trace_events = [{"name": "thread_name", "ph": "M", "pid": process_id, "tid": thread_id,
+                         "args": {"name": thread_name}} for thread_id, thread_name in thread_names.items()]
+        for event in events:
+            trace_events.append({"name": event["name"], "cat": event["category"], "ph": "X",
+                                 "ts": round(event["start"] * 1e6, 3), "dur": round(event["duration"] * 1e6, 3),
+                                 "pid": process_id, "tid": event["thread"], "args": event["args"]})
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms", "otherData": {"summary": self.summary()}}
+
+    def write(self, path: str, trace_format: str = "json") -> None:
+        if trace_format not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format {trace_format}, use one of {', '.join(TRACE_FORMATS)}")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        trace = self.to_chrome_trace() if trace_format == "chrome" else self.to_json()
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(trace, file, indent=1 if trace_format == "json" else None)
+
+
+# the tracer everything records to, disabled unless tracing was started
+_tracer = Tracer(enabled=False)
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def start_tracing() -> Tracer:
+    """
+    Replace the current tracer with an enabled one and return it.
+    """
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop_tracing() -> Tracer:
+    """
+    Disable tracing and return the tracer that was used until now.
+    """
+    global _tracer
+    tracer, _tracer = _tracer, Tracer(enabled=False)
+    return tracer
@@ -0,0 +1,179 @@
+import heapq
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+from app.instrumentation import JOB, get_tracer
+
+# Status codes that mean "come back later" rather than "the job failed"
+RETRYABLE_STATUS_CODES = (429, 502, 503, 504)
+
+
+def retry_after_seconds(response) -> Optional[float]:
+    """
+    Seconds to wait according to the `Retry-After` header of a throttled response, None if it has none.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class OperationCancelled(Exception):
+    """
+    Raised when a long running operation notices that it was cancelled.
+    """
+
+
+class Job:
+    """
+    An asynchronous API job (content export, report, app upload/delete...) tracked by `JobPoller`.
+
+    `timeout` is counted from the first poll of the job, and a job only times out once a poll after its deadline
+    still finds it running. Once the job is done, `success` and `message` hold the outcome. If polling itself failed or the job timed out,
+    `error` holds the exception instead.
+    """
+
+    def __init__(self, key: Any, get_status: Callable[[], Any], success_status: str = "success",
+                 failure_status: str = "failed", timeout: float = 180, kind: str = "job"):
+        self.key = key
+        self.get_status = get_status
+        self.success_status = success_status
+        self.failure_status = failure_status
+        self.timeout = timeout
+        self.kind = kind
+
+        self.done = False
+        self.success = None
+        self.message = None
+        self.error = None
+        self.polls = 0
+        self.started_at = None
+        self.delay = None
+
+    def __repr__(self):
+        return f"Job(key={self.key!r}, kind={self.kind}, done={self.done}, success={self.success}, polls={self.polls})"
+
+    def finish(self, success: bool = None, message: str = None, error: Exception = None) -> None:
+        self.done = True
+        self.success = success
+        self.message = message
+        self.error = error
+
+
+class JobPoller:
+    """
+    Polls any number of outstanding jobs in a single loop.
+
+    Every job is polled with exponential backoff: the first poll happens `initial_delay` seconds after the job is
+    tracked and the delay grows by `backoff_factor` up to `max_delay`, with +/- `jitter` randomization so jobs
+    submitted together don't poll in lockstep. A `Retry-After` header on a throttled response overrides the
+    backoff. The API client already keeps all requests of an access key under the API rate limit;
+    `max_polls_per_second` optionally caps the polls of this poller on top of that. Setting `cancel_event` stops the
+    polling with `OperationCancelled`.
+    """
+
+    def __init__(self, initial_delay: float = 0.2, max_delay: float = 5.0, backoff_factor: float = 1.5,
+                 jitter: float = 0.2, max_polls_per_second: Optional[float] = None,
+                 cancel_event: Optional[threading.Event] = None):
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.min_poll_interval = 1.0 / max_polls_per_second if max_polls_per_second else 0.0
+        self._last_poll_at = None
+        self.cancel_event = cancel_event
+
+    def as_completed(self, jobs: Iterable[Job]) -> Iterator[Job]:
+        """
+        Track `jobs` until all of them are done, yielding each job as soon as it finishes.
+        """
+        queue = []
+        now = time.monotonic()
+        tracked_at = time.perf_counter()
+        for sequence, job in enumerate(jobs):
+            job.started_at = None
+            job.delay = self.initial_delay
+            heapq.heappush(queue, (now + self._jittered(job.delay), sequence, job))
+
+        while queue:
+            poll_at, sequence, job = heapq.heappop(queue)
+            if self._last_poll_at is not None:
+                poll_at = max(poll_at, self._last_poll_at + self.min_poll_interval)
+            self._sleep(max(0.0, poll_at - time.monotonic()))
+
+            next_poll_at = self._poll(job)
+            if job.done:
+                self._trace(job, tracked_at)
+                yield job
+            else:
+                heapq.heappush(queue, (next_poll_at, sequence, job))
+
+    def wait_all(self, jobs: Iterable[Job]) -> List[Job]:
+        """
+        Track `jobs` until all of them are done and return them in their original order.
+        """
+        jobs = list(jobs)
+        for _ in self.as_completed(jobs):
+            pass
+        return jobs
+
+    @staticmethod
+    def _trace(job: Job, tracked_at: float) -> None:
+        tracer = get_tracer()
+        if not tracer.enabled:
+            return
+        args = {"polls": job.polls, "success": bool(job.success)}
+        if job.error:
+            args["error"] = str(job.error)
+        tracer.add_event(job.kind, JOB, tracked_at, time.perf_counter() - tracked_at, **args)
+
+    def _poll(self, job: Job) -> Optional[float]:
+        self._last_poll_at = time.monotonic()
+        job.polls += 1
+        try:
+            response = job.get_status()
+            now = time.monotonic()
+            if job.started_at is None:
+                # time spent waiting for the first poll, e.g. behind the rate limit of the API client, doesn't count
+                job.started_at = now
+            retry_after = None
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                retry_after = retry_after_seconds(response)
+            else:
+                response_json = response.json()
+                status = response_json["status"].lower()
+                if status == job.success_status:
+                    job.finish(success=True, message="success")
+                    return None
+                if status == job.failure_status:
+                    job.finish(success=False,
+                               message=(response_json.get('error') or {}).get('message', 'No message'))
+                    return None
+        except Exception as e:
+            job.finish(error=Exception(f"Encountered an error while waiting for job completion: {e}"))
+            return None
+
+        if now - job.started_at > job.timeout:
+            job.finish(error=Exception("Job timed out."))
+            return None
+        job.delay = min(job.delay * self.backoff_factor, self.max_delay)
+        return now + (retry_after if retry_after is not None else self._jittered(job.delay))
+
+    def _sleep(self, seconds: float) -> None:
+        if self.cancel_event is None:
+            time.sleep(seconds)
+        elif self.cancel_event.wait(seconds):
+            raise OperationCancelled("Cancelled while waiting for jobs to complete")
+
+    def _jittered(self, delay: float) -> float:
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
@@ -0,0 +1,152 @@
+import os
+import re
+import tempfile
+from typing import List, Optional
+
+import yaml
+
+LOCATION_PATTERN = re.compile(r'^\s*(?:-\s+)?location:\s*(.*?)\s*$')
+NAME_PATTERN = re.compile(r'^name:.*$', re.MULTILINE)
+
+
+def yaml_quote(value: Optional[str]) -> str:
+    """
+    Render `value` as a double-quoted YAML scalar, escaping quotes, backslashes and line breaks.
+    """
+    return yaml.safe_dump("" if value is None else str(value), default_style='"', allow_unicode=True,
+                          width=float("inf")).rstrip("\n")
+
+
+def write_manifest_name(manifest_path: str, name: str) -> None:
+    """
+    Set the top level `name` of the manifest, keeping the rest of the file as it is.
+    """
+    with open(manifest_path, 'r', encoding='utf-8') as file:
+        content = file.read()
+    content, count = NAME_PATTERN.subn(lambda _: f"name: {yaml_quote(name)}", content, count=1)
+    if not count:
+        raise ValueError("name field not found in the manifest.")
+    with open(manifest_path, 'w', encoding='utf-8') as file:
+        file.write(content)
+
+
+class ManifestMediaWriter:
+    """
+    Collects `appMedia` entries and writes all of them to manifest.yaml in a single pass.
+
+    The manifest is edited line by line, so comments and formatting outside of the new entries are kept. A collected
+    entry replaces an existing entry with the same location, which keeps repeated imports from duplicating
+    screenshots. The file is replaced atomically.
+    """
+
+    def __init__(self, manifest_path: str):
+        self.manifest_path = manifest_path
+        self.entries = []
+        self.removed_locations = set()
+
+    def add(self, title: str, description: Optional[str], media_type: str, location: str) -> None:
+        self.entries.append({
+            "title": title,
+            "description": description,
+            "type": media_type,
+            "location": location,
+        })
+
+    def add_image(self, title: str, description: Optional[str], image_path: str) -> None:
+        self.add(title, description, "image", self.image_location(image_path))
+
+    def remove_image(self, image_path: str) -> None:
+        """
+        Drop the existing entry of `image_path` from the manifest.
+        """
+        self.removed_locations.add(self.image_location(image_path))
+
+    def image_location(self, image_path: str) -> str:
+        # Convert the image path to a relative path
+        relative_path = os.path.relpath(image_path, start=os.path.dirname(self.manifest_path))
+        relative_path = relative_path.replace('\\', '/')  # Convert to forward slashes for consistency
+        if not relative_path.startswith('.'):
+            relative_path = f"./{relative_path}"
+        return relative_path
+
+    def write(self) -> None:
+        if not self.entries and not self.removed_locations:
+            return
+
+        with open(self.manifest_path, 'r', encoding='utf-8') as file:
+            lines = file.readlines()
+
+        # Locate the appMedia list
+        app_media_index = None
+        for i, line in enumerate(lines):
+            if line.strip() == 'appMedia:':
+                app_media_index = i
+                break
+
+        # If appMedia field not found, raise an error
+        if app_media_index is None:
+            raise ValueError("appMedia field not found in the manifest.")
+
+        # The list ends at the first blank line or at the next top level key
+        end_index = app_media_index + 1
+        while end_index < len(lines):
+            line = lines[end_index]
+            if line.strip() == '' or (not line[0].isspace() and not line.startswith('-')):
+                break
+            end_index += 1
+
+        new_locations = {entry["location"] for entry in self.entries} | self.removed_locations
+        kept_lines = []
+        for item in self._split_items(lines[app_media_index + 1:end_index]):
+            if self._item_location(item) not in new_locations:
+                kept_lines.extend(item)
+
+        new_lines = [self._render_entry(entry) for entry in self.entries]
+        lines[app_media_index + 1:end_index] = kept_lines + new_lines
+
+        self._replace_file(lines)
+        self.entries = []
+        self.removed_locations = set()
+
+    @staticmethod
+    def _split_items(lines: List[str]) -> List[List[str]]:
+        items = []
+        for line in lines:
+            if line.lstrip().startswith('- ') or not items:
+                items.append([line])
+            else:
+                items[-1].append(line)
+        return items
+
+    @staticmethod
+    def _item_location(item: List[str]) -> Optional[str]:
+        for line in item:
+            match = LOCATION_PATTERN.match(line)
+            if match:
+                try:
+                    return str(yaml.safe_load(match.group(1)))
+                except yaml.YAMLError:
+                    return match.group(1)
+        return None
+
+    @staticmethod
+    def _render_entry(entry) -> str:
+        return (
+            f'  - title: {yaml_quote(entry["title"])}\n'
+            f'    description: {yaml_quote(entry["description"])}\n'
+            f'    type: {yaml_quote(entry["type"])}\n'
+            f'    location: {yaml_quote(entry["location"])}\n'
+        )
+
+    def _replace_file(self, lines: List[str]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.manifest_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".manifest-", suffix=".yaml")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                file.writelines(lines)
+            os.chmod(temp_path, os.stat(self.manifest_path).st_mode)
+            os.replace(temp_path, self.manifest_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
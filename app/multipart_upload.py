@@ -0,0 +1,62 @@
+import os
+import threading
+import uuid
+from typing import Callable, Iterator, Optional
+
+from app.job_poller import OperationCancelled
+
+DEFAULT_UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# called with the number of bytes sent so far and the total number of bytes of the body
+ProgressCallback = Callable[[int, int], None]
+
+
+class MultipartFileStream:
+    """
+    multipart/form-data request body with a single file field, read from disk in `chunk_size` pieces while it is
+    sent.
+
+    `requests` streams iterable bodies, and since the length of the body is known up front it is sent with a
+    Content-Length header instead of chunked encoding. Every iteration reads the file from the start, so the same
+    stream can be sent again when a request is retried. Setting `cancel_event` aborts the upload with
+    `OperationCancelled` before the next chunk.
+    """
+
+    def __init__(self, path: str, field_name: str = "file", file_name: Optional[str] = None,
+                 content_type: Optional[str] = None, chunk_size: int = DEFAULT_UPLOAD_CHUNK_SIZE,
+                 progress: Optional[ProgressCallback] = None, cancel_event: Optional[threading.Event] = None):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.cancel_event = cancel_event
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+
+        file_name = file_name or os.path.basename(path)
+        part_headers = f'Content-Disposition: form-data; name="{field_name}"; filename="{file_name}"\r\n'
+        if content_type:
+            part_headers += f"Content-Type: {content_type}\r\n"
+        self._preamble = f"--{self.boundary}\r\n{part_headers}\r\n".encode("utf-8")
+        self._epilogue = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self._preamble) + os.path.getsize(self.path) + len(self._epilogue)
+
+    def __iter__(self) -> Iterator[bytes]:
+        total = len(self)
+        sent = 0
+        for chunk in self._chunks():
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                raise OperationCancelled(f"Upload of {self.path} cancelled")
+            yield chunk
+            # the next chunk is only requested once this one was sent
+            sent += len(chunk)
+            if self.progress is not None:
+                self.progress(sent, total)
+
+    def _chunks(self) -> Iterator[bytes]:
+        yield self._preamble
+        with open(self.path, 'rb') as file:
+            for chunk in iter(lambda: file.read(self.chunk_size), b""):
+                yield chunk
+        yield self._epilogue
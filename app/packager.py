@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+DEFAULT_COMPRESSION_LEVEL = 6
+
+# files that are compressed already are stored as they are, deflating them again only costs time
+STORED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".zip", ".gz"}
+
+# every entry gets the same timestamp and permissions, so packing the same files always gives the same archive
+ENTRY_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+FILE_MODE = 0o100644
+DIRECTORY_MODE = 0o040755
+MS_DOS_DIRECTORY_FLAG = 0x10
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# bump when a change to the packer makes archives of previous versions differ from what it would write now
+MANIFEST_VERSION = 1
+
+# size of the fixed part of a local file header, followed by the file name and the extra field
+LOCAL_FILE_HEADER_SIZE = 30
+DATA_DESCRIPTOR_FLAG = 0x08
+
+
+class PackResult:
+    def __init__(self, zip_path: str, rebuilt: bool, copied: int, compressed: int):
+        self.zip_path = zip_path
+        # False if the archive was up to date and left untouched
+        self.rebuilt = rebuilt
+        # number of files whose compressed data was copied from the previous archive
+        self.copied = copied
+        # number of files that were compressed again
+        self.compressed = compressed
+
+    def __repr__(self):
+        return f"PackResult(rebuilt={self.rebuilt}, copied={self.copied}, compressed={self.compressed})"
+
+
+class Packager:
+    """
+    Packs an app folder into a zip archive.
+
+    Entries are written in sorted order with fixed timestamps and permissions, so the archive only changes when
+    the packed files do. Already compressed files (screenshots) are stored, everything else is deflated with
+    `compression_level`. Files are streamed into the archive in chunks, so memory use doesn't depend on their size.
+
+    With a manifest, the size, modification time and hash of every packed file are recorded next to the archive.
+    Packing again leaves the archive untouched if no file changed, and otherwise copies the compressed data of
+    unchanged files from the previous archive, so only changed files are compressed again.
+    """
+
+    def __init__(self, compression_level: int = DEFAULT_COMPRESSION_LEVEL):
+        self.compression_level = compression_level
+
+    def pack(self, folder_path: str, zip_path: str, manifest_path: Optional[str] = None) -> PackResult:
+        """
+        Pack `folder_path` into `zip_path`. The archive contains the folder itself as its single root entry, the
+        way `shutil.make_archive` lays it out. The archive is replaced atomically.
+
+        :param manifest_path: where the manifest of the archive is kept, without one the archive is always rebuilt
+        """
+        if not os.path.isdir(folder_path):
+            raise FileNotFoundError(f"Folder {folder_path} does not exist")
+
+        entries = self.entries(folder_path)
+        directories = [arcname for arcname, _ in entries if arcname.endswith("/")]
+        previous = self.load_manifest(manifest_path, zip_path) if manifest_path else None
+        previous_files = previous["files"] if previous else {}
+
+        files = {}
+        for arcname, path in entries:
+            if arcname.endswith("/"):
+                continue
+            stat = os.stat(path)
+            previous_file = previous_files.get(arcname)
+            if previous_file and previous_file["size"] == stat.st_size \
+                    and previous_file["mtime_ns"] == stat.st_mtime_ns:
+                digest = previous_file["sha256"]
+            else:
+                digest = self.file_digest(path)
+            files[arcname] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+
+        unchanged = {arcname for arcname, file in files.items()
+                     if arcname in previous_files and previous_files[arcname]["sha256"] == file["sha256"]}
+        if previous and unchanged == set(files) == set(previous_files) and directories == previous["directories"]:
+            # refresh the recorded modification times, so the files aren't hashed again next time
+            self.save_manifest(manifest_path, zip_path, directories, files)
+            return PackResult(zip_path, rebuilt=False, copied=0, compressed=0)
+
+        self.write_archive(zip_path, entries, unchanged if previous else set())
+        if manifest_path:
+            self.save_manifest(manifest_path, zip_path, directories, files)
+        copied = len(unchanged) if previous else 0
+        return PackResult(zip_path, rebuilt=True, copied=copied, compressed=len(files) - copied)
+
+    def write_archive(self, zip_path: str, entries: List[Tuple[str, str]], unchanged: Set[str]) -> None:
+        zip_directory = os.path.dirname(os.path.abspath(zip_path))
+        os.makedirs(zip_directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=zip_directory, prefix=".pack-", suffix=".zip")
+        try:
+            previous_archive = zipfile.ZipFile(zip_path) if unchanged else None
+            try:
+                with os.fdopen(fd, 'wb') as file, zipfile.ZipFile(file, 'w') as archive:
+                    for arcname, path in entries:
+                        if arcname.endswith("/"):
+                            self.write_directory(archive, arcname)
+                        elif arcname in unchanged and arcname in previous_archive.NameToInfo:
+                            self.copy_entry(archive, previous_archive, arcname)
+                        else:
+                            self.write_file(archive, arcname, path)
+            finally:
+                if previous_archive is not None:
+                    previous_archive.close()
+            os.replace(temp_path, zip_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @staticmethod
+    def entries(folder_path: str) -> List[Tuple[str, str]]:
+        """
+        (archive name, path) of the folder and everything in it, sorted by archive name. Directory names end with
+        a slash.
+        """
+        parent_path, folder_name = os.path.split(os.path.normpath(folder_path))
+        entries = []
+        for directory, directory_names, file_names in os.walk(folder_path):
+            relative_directory = os.path.relpath(directory, parent_path).replace(os.sep, "/")
+            entries.append((f"{relative_directory}/", directory))
+            for file_name in file_names:
+                entries.append((f"{relative_directory}/{file_name}", os.path.join(directory, file_name)))
+        return sorted(entries)
+
+    def compress_type(self, arcname: str) -> int:
+        if os.path.splitext(arcname)[1].lower() in STORED_EXTENSIONS:
+            return zipfile.ZIP_STORED
+        return zipfile.ZIP_DEFLATED
+
+    @staticmethod
+    def write_directory(archive: zipfile.ZipFile, arcname: str) -> None:
+        info = zipfile.ZipInfo(arcname, date_time=ENTRY_DATE_TIME)
+        info.external_attr = (DIRECTORY_MODE << 16) | MS_DOS_DIRECTORY_FLAG
+        archive.writestr(info, b"")
+
+    def write_file(self, archive: zipfile.ZipFile, arcname: str, path: str) -> None:
+        info = zipfile.ZipInfo(arcname, date_time=ENTRY_DATE_TIME)
+        info.external_attr = FILE_MODE << 16
+        info.compress_type = self.compress_type(arcname)
+        if info.compress_type == zipfile.ZIP_DEFLATED:
+            info._compresslevel = self.compression_level
+        file_size = os.path.getsize(path)
+        with open(path, 'rb') as source, archive.open(info, 'w', force_zip64=file_size > zipfile.ZIP64_LIMIT) \
+                as target:
+            shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+
+    @staticmethod
+    def copy_entry(archive: zipfile.ZipFile, source: zipfile.ZipFile, arcname: str) -> None:
+        """
+        Copy the compressed data of `arcname` from `source` into `archive` without decompressing it.
+        """
+        source_info = source.getinfo(arcname)
+        info = zipfile.ZipInfo(arcname, date_time=ENTRY_DATE_TIME)
+        info.external_attr = source_info.external_attr
+        info.compress_type = source_info.compress_type
+        info.flag_bits = source_info.flag_bits & ~DATA_DESCRIPTOR_FLAG
+        info.CRC = source_info.CRC
+        info.compress_size = source_info.compress_size
+        info.file_size = source_info.file_size
+
+        source.fp.seek(source_info.header_offset)
+        header = source.fp.read(LOCAL_FILE_HEADER_SIZE)
+        name_length, extra_length = struct.unpack("<HH", header[26:30])
+        source.fp.seek(source_info.header_offset + LOCAL_FILE_HEADER_SIZE + name_length + extra_length)
+
+        # zipfile has no public API for writing precompressed data, this mirrors what ZipFile.open(..., 'w') does
+        zip64 = info.file_size > zipfile.ZIP64_LIMIT or info.compress_size > zipfile.ZIP64_LIMIT
+        info.header_offset = archive.fp.tell()
+        archive.fp.write(info.FileHeader(zip64))
+        remaining = info.compress_size
+        while remaining > 0:
+            chunk = source.fp.read(min(COPY_CHUNK_SIZE, remaining))
+            if not chunk:
+                raise zipfile.BadZipFile(f"Truncated entry {arcname} in {source.filename}")
+            archive.fp.write(chunk)
+            remaining -= len(chunk)
+        archive.filelist.append(info)
+        archive.NameToInfo[arcname] = info
+        archive.start_dir = archive.fp.tell()
+        archive._didModify = True
+
+    @staticmethod
+    def file_digest(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(COPY_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def load_manifest(self, manifest_path: str, zip_path: str) -> Optional[Dict[str, Any]]:
+        """
+        The manifest of the previous archive, or None if it can't be trusted: it is missing or unreadable, was
+        written with different settings, or the archive was changed or removed since.
+        """
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as file:
+                manifest = json.load(file)
+            archive_stat = os.stat(zip_path)
+            if manifest["version"] != MANIFEST_VERSION or manifest["compression_level"] != self.compression_level \
+                    or manifest["archive"] != {"size": archive_stat.st_size, "mtime_ns": archive_stat.st_mtime_ns} \
+                    or not isinstance(manifest["directories"], list) or not isinstance(manifest["files"], dict):
+                return None
+            return manifest
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save_manifest(self, manifest_path: str, zip_path: str, directories: List[str],
+                      files: Dict[str, Dict[str, Any]]) -> None:
+        archive_stat = os.stat(zip_path)
+        temp_path = f"{manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "compression_level": self.compression_level,
+                "archive": {"size": archive_stat.st_size, "mtime_ns": archive_stat.st_mtime_ns},
+                "directories": directories,
+                "files": files,
+            }, file, indent=1, sort_keys=True)
+        os.replace(temp_path, manifest_path)
@@ -0,0 +1,128 @@
+import os
+import signal
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from app.instrumentation import PROCESS, get_tracer
+
+# seconds a terminated process gets to exit before it is killed
+TERMINATE_GRACE_PERIOD = 5
+
+# on POSIX every process gets its own process group, so child processes (e.g. terraform providers) are stopped too
+USE_PROCESS_GROUPS = os.name == "posix"
+
+
+class ProcessResult:
+    def __init__(self, args: List[str], returncode: Optional[int], duration: float, timed_out: bool = False,
+                 cancelled: bool = False):
+        self.args = args
+        self.returncode = returncode
+        self.duration = duration
+        self.timed_out = timed_out
+        self.cancelled = cancelled
+
+    @property
+    def success(self) -> bool:
+        return self.returncode == 0 and not self.timed_out and not self.cancelled
+
+    def describe(self) -> str:
+        if self.cancelled:
+            status = "was cancelled"
+        elif self.timed_out:
+            status = "timed out"
+        else:
+            status = f"exited with return code {self.returncode}"
+        return f"{self.args[0]} {status} after {self.duration:.1f}s"
+
+    def __repr__(self):
+        return (f"ProcessResult(returncode={self.returncode}, duration={self.duration:.2f}, "
+                f"timed_out={self.timed_out}, cancelled={self.cancelled})")
+
+
+class ProcessRunner:
+    """
+    Runs external processes without a shell and streams their output line by line to `log_sink` while they run.
+
+    A process is terminated (and killed if it doesn't exit) when it runs longer than its timeout or when its cancel
+    event is set. The outcome is returned as a `ProcessResult` instead of raising.
+    """
+
+    def __init__(self, log_sink: Callable[[str], None] = print, poll_interval: float = 0.1):
+        self.log_sink = log_sink
+        self.poll_interval = poll_interval
+
+    def run(self, args: List[str], env: Optional[Dict[str, str]] = None, cwd: Optional[str] = None,
+            timeout: Optional[float] = None, cancel_event: Optional[threading.Event] = None,
+            log_prefix: str = "") -> ProcessResult:
+        """
+        Run `args` and wait for it to exit.
+
+        :param env: complete environment of the process, the environment of this process is never modified
+        :param timeout: seconds after which the process is terminated
+        :param cancel_event: the process is terminated as soon as this event is set
+        :param log_prefix: prepended to every line of output passed to the log sink
+        """
+        started_at = time.monotonic()
+        traced_at = time.perf_counter()
+        process = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   env=env, cwd=cwd, text=True, errors="replace", bufsize=1,
+                                   start_new_session=USE_PROCESS_GROUPS)
+        readers = [
+            threading.Thread(target=self._stream, args=(process.stdout, log_prefix), daemon=True),
+            threading.Thread(target=self._stream, args=(process.stderr, log_prefix), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        timed_out = False
+        cancelled = False
+        while True:
+            try:
+                process.wait(timeout=self.poll_interval)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+            elif timeout is not None and time.monotonic() - started_at > timeout:
+                timed_out = True
+            if cancelled or timed_out:
+                self._stop(process)
+                break
+
+        for reader in readers:
+            # children of a stopped process may keep its output open, don't wait for them
+            reader.join(timeout=TERMINATE_GRACE_PERIOD if cancelled or timed_out else None)
+        result = ProcessResult(args, process.returncode, time.monotonic() - started_at, timed_out=timed_out,
+                               cancelled=cancelled)
+        trace_args = {"returncode": result.returncode, "success": result.success}
+        if not result.success:
+            trace_args["error"] = result.describe()
+        get_tracer().add_event(os.path.basename(args[0]), PROCESS, traced_at, time.perf_counter() - traced_at,
+                               **trace_args)
+        return result
+
+    def _stream(self, stream, log_prefix: str) -> None:
+        with stream:
+            for line in stream:
+                self.log_sink(f"{log_prefix}{line.rstrip()}")
+
+    @staticmethod
+    def _signal(process: subprocess.Popen, sig) -> None:
+        try:
+            if USE_PROCESS_GROUPS:
+                os.killpg(process.pid, sig)
+            else:
+                process.send_signal(sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def _stop(self, process: subprocess.Popen) -> None:
+        self._signal(process, signal.SIGTERM)
+        try:
+            process.wait(timeout=TERMINATE_GRACE_PERIOD)
+        except subprocess.TimeoutExpired:
+            self._signal(process, signal.SIGKILL if USE_PROCESS_GROUPS else signal.SIGTERM)
+            process.wait()
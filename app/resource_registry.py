@@ -0,0 +1,19 @@
+from typing import Dict, List
+
+
+class ResourceRegistry:
+    """
+    Terraform resources emitted during an import, grouped by resource type in the order they were written.
+
+    The generators register every resource block they write, so outputs are generated from the registry instead of
+    parsing the .tf files again.
+    """
+
+    def __init__(self):
+        self._names: Dict[str, List[str]] = {}
+
+    def add(self, resource_type: str, name: str) -> None:
+        self._names.setdefault(resource_type, []).append(name)
+
+    def names(self, resource_type: str) -> List[str]:
+        return list(self._names.get(resource_type, []))
@@ -0,0 +1,75 @@
+"""
+Compares the per-pixel screenshot cropping with the band-mask implementation in
+`AppContentManager.screenshot_content_bbox` on synthetic dark themed dashboard screenshots.
+
+Run from the repository root:
+
+    python3 -m benchmarks.crop_benchmark --width 2400 --height 6000
+"""
+import argparse
+import random
+import time
+
+from PIL import Image, ImageDraw
+
+from app.app_content_manager import AppContentManager, DARK_THEME_BACKGROUND_COLOR
+
+
+def synthetic_screenshot(width: int, height: int, seed: int) -> Image.Image:
+    rng = random.Random(seed)
+    image = Image.new("RGBA", (width, height), DARK_THEME_BACKGROUND_COLOR)
+    draw = ImageDraw.Draw(image)
+    # dashboard panels, leaving a margin of background on the right and bottom
+    content_width = int(width * rng.uniform(0.6, 0.95))
+    content_height = int(height * rng.uniform(0.6, 0.95))
+    for _ in range(20):
+        x = rng.randrange(0, content_width - 20)
+        y = rng.randrange(0, content_height - 20)
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256), 255)
+        right = min(x + rng.randrange(10, 400), content_width)
+        bottom = min(y + rng.randrange(10, 300), content_height)
+        draw.rectangle((x, y, right, bottom), fill=color)
+    return image
+
+
+def per_pixel_bbox(image: Image.Image):
+    img_copy = image.copy()
+    for y in range(img_copy.size[1]):
+        for x in range(img_copy.size[0]):
+            if img_copy.getpixel((x, y)) == DARK_THEME_BACKGROUND_COLOR:
+                img_copy.putpixel((x, y), (0, 0, 0, 0))
+    return img_copy.getbbox()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark screenshot cropping")
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=1500)
+    parser.add_argument("--images", type=int, default=3)
+    parser.add_argument("--skip-per-pixel", action="store_true",
+                        help="Only time the band-mask implementation")
+    args = parser.parse_args()
+
+    images = [synthetic_screenshot(args.width, args.height, seed) for seed in range(args.images)]
+
+    start = time.perf_counter()
+    fast_bboxes = [AppContentManager.screenshot_content_bbox(image) for image in images]
+    fast_time = time.perf_counter() - start
+    print(f"band masks: {fast_time / len(images):.4f} s per {args.width}x{args.height} image")
+
+    if args.skip_per_pixel:
+        return
+
+    start = time.perf_counter()
+    slow_bboxes = [per_pixel_bbox(image) for image in images]
+    slow_time = time.perf_counter() - start
+    print(f"per pixel:  {slow_time / len(images):.4f} s per {args.width}x{args.height} image")
+    print(f"speedup:    {slow_time / fast_time:.0f}x")
+
+    if fast_bboxes != slow_bboxes:
+        raise SystemExit(f"Bounding boxes differ: {fast_bboxes} != {slow_bboxes}")
+    print("bounding boxes are identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Stand-in for sumologic-terraformer that imports dashboards from the mock API server.
+
+It accepts the arguments the tool passes to terraformer,
+
+    fake_terraformer.py import sumologic -v --resources=dashboard --filter Name=id;Value=<id>:<id> -o <path>
+
+fetches every dashboard from `SUMOLOGIC_BASE_URL` and writes `<path>/sumologic/dashboard/dashboard.tf` with resource
+names and titles the way terraformer writes them. `FAKE_TERRAFORMER_STARTUP_DELAY` adds a fixed startup time in
+seconds, like the provider initialization of the real terraformer.
+"""
+import base64
+import json
+import os
+import re
+import sys
+import time
+import urllib.request
+from typing import Any, Dict, List
+
+STARTUP_DELAY_VARIABLE = "FAKE_TERRAFORMER_STARTUP_DELAY"
+
+
+def parse_dashboard_ids(args: List[str]) -> List[str]:
+    resource_filter = args[args.index("--filter") + 1]
+    return [dashboard_id for dashboard_id in resource_filter.split("Value=", 1)[1].split(":") if dashboard_id]
+
+
+def fetch_dashboard(base_url: str, dashboard_id: str) -> Dict[str, Any]:
+    request = urllib.request.Request(f"{base_url}v2/dashboards/{dashboard_id}")
+    credentials = f"{os.environ.get('SUMOLOGIC_ACCESS_ID', '')}:{os.environ.get('SUMOLOGIC_ACCESS_KEY', '')}"
+    request.add_header("Authorization", "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii"))
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return json.load(response)
+
+
+def terraformer_name(text: str) -> str:
+    # terraformer replaces every character that isn't allowed in a resource name with its hex code
+    return re.sub(r"[^A-Za-z0-9]", lambda match: f"-{ord(match.group()):04x}-", text)
+
+
+def dashboard_resource(dashboard: Dict[str, Any]) -> str:
+    name = terraformer_name(dashboard["title"])
+    lines = [
+        f'resource "sumologic_dashboard" "tfer--{name}-_{name}-{dashboard["id"]}" {{',
+        f'  description       = {json.dumps(dashboard.get("description", ""))}',
+        f'  folder_id         = "{dashboard["folderId"]}"',
+    ]
+    for panel in dashboard.get("panels", []):
+        lines += [
+            "",
+            "  panel {",
+            "    sumo_search_panel {",
+            f'      key   = {json.dumps(panel["key"])}',
+            f'      title = {json.dumps(panel["title"])}',
+        ]
+        for query in panel.get("queries", []):
+            lines += [
+                "",
+                "      query {",
+                f'        query_key    = {json.dumps(query["queryKey"])}',
+                f'        query_string = {json.dumps(query["queryString"])}',
+                f'        query_type   = {json.dumps(query["queryType"])}',
+                "      }",
+            ]
+        lines += ["    }", "  }"]
+    lines += [
+        "",
+        f'  refresh_interval = "{dashboard.get("refreshInterval", 0)}"',
+        f'  theme            = {json.dumps(dashboard.get("theme", "Dark"))}',
+        "",
+        "  time_range {",
+        "    begin_bounded_time_range {",
+        "      from {",
+        "        relative_time_range {",
+        f'          relative_time = "{dashboard["timeRange"]["from"]["relativeTime"]}"',
+        "        }",
+        "      }",
+        "    }",
+        "  }",
+        "",
+        f'  title = {json.dumps(dashboard["title"] + " - New")}',
+        "}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def main(args: List[str]) -> int:
+    base_url = os.environ.get("SUMOLOGIC_BASE_URL")
+    if not base_url:
+        print("SUMOLOGIC_BASE_URL is not set", file=sys.stderr)
+        return 1
+    time.sleep(float(os.environ.get(STARTUP_DELAY_VARIABLE) or 0))
+
+    dashboard_ids = parse_dashboard_ids(args)
+    output_path = os.path.join(args[args.index("-o") + 1], "sumologic", "dashboard")
+    os.makedirs(output_path, exist_ok=True)
+    with open(os.path.join(output_path, "dashboard.tf"), "w", encoding="utf-8") as file:
+        for index, dashboard_id in enumerate(dashboard_ids):
+            if index:
+                file.write("\n")
+            file.write(dashboard_resource(fetch_dashboard(base_url, dashboard_id)))
+    print(f"sumologic importing... dashboard ({len(dashboard_ids)} resources)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,436 @@
+"""
+Local stand-in for the parts of the Sumo Logic API the tool uses: folders, dashboards (by id and paginated),
+content export jobs, dashboard report jobs and private app register/upload/delete.
+
+The content tree is generated from a few sizes, every request can be delayed to simulate the network round trip and
+jobs finish after a configurable time. Point the tool at the server with the `SUMO_API_BASE_URL` environment
+variable.
+
+Run from the repository root:
+
+    python3 -m benchmarks.mock_sumo_server --dashboards 50 --searches 50 --folders 5 --latency 0.05
+"""
+import argparse
+import io
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from PIL import Image, ImageDraw
+
+# background color of the dark themed screenshots, see `AppContentManager.crop_dashboard_screenshot`
+SCREENSHOT_BACKGROUND_COLOR = (16, 24, 39, 255)
+
+DEFAULT_PAGE_SIZE = 100
+UPLOAD_READ_CHUNK_SIZE = 256 * 1024
+
+# (method, path below /api/, handler), the first matching route handles the request
+ROUTES = [
+    ("GET", r"v2/content/folders/(?P<folder_id>[^/]+)", "get_folder"),
+    ("GET", r"v2/dashboards/", "list_dashboards"),
+    ("POST", r"v2/dashboards/reportJobs", "start_report"),
+    ("GET", r"v2/dashboards/reportJobs/(?P<job_id>[^/]+)/status", "job_status"),
+    ("GET", r"v2/dashboards/reportJobs/(?P<job_id>[^/]+)/result", "report_result"),
+    ("GET", r"v2/dashboards/(?P<dashboard_id>[^/]+)", "get_dashboard"),
+    ("POST", r"v2/content/(?P<content_id>[^/]+)/export", "start_export"),
+    ("GET", r"v2/content/(?P<content_id>[^/]+)/export/(?P<job_id>[^/]+)/status", "job_status"),
+    ("GET", r"v2/content/(?P<content_id>[^/]+)/export/(?P<job_id>[^/]+)/result", "export_result"),
+    ("POST", r"v2/apps/private", "register_app"),
+    ("GET", r"v2/apps/private/(?:upload|delete)/(?P<job_id>[^/]+)/status", "job_status"),
+    ("PUT", r"v2/apps/private/(?P<app_uuid>[^/]+)", "upload_app"),
+    ("DELETE", r"v2/apps/private/(?P<app_uuid>[^/]+)", "delete_app"),
+]
+COMPILED_ROUTES = [(method, re.compile(pattern), handler) for method, pattern, handler in ROUTES]
+
+
+class MockContent:
+    """
+    A generated app folder: `folders` sub folders spread over `depth` levels below the app folder, and `dashboards`
+    dashboards and `searches` saved searches spread round robin over all folders.
+    """
+
+    def __init__(self, dashboards: int = 10, searches: int = 10, folders: int = 3, depth: int = 2,
+                 panels: int = 4):
+        self.app_folder_id = self.content_id(1)
+        self.folders: Dict[str, Dict[str, Any]] = {}
+        self.dashboards: Dict[str, Dict[str, Any]] = {}
+        self.searches: Dict[str, Dict[str, Any]] = {}
+
+        self.folders["personal"] = self.folder("personal", "Personal", "0000000000000000")
+        self.folders[self.app_folder_id] = self.folder(self.app_folder_id, "Benchmark App", "personal")
+        self.folders["personal"]["children"].append(self.child(self.folders[self.app_folder_id]))
+
+        levels = [[self.app_folder_id]]
+        for index in range(folders):
+            # folders are spread evenly over the levels, a level is only started once the one above has a folder
+            level = min(len(levels), max(depth, 1), 1 + index * depth // folders)
+            if level == len(levels):
+                levels.append([])
+            parents = levels[level - 1]
+            parent_id = parents[index % len(parents)]
+            folder_id = self.content_id(0x100000 + index)
+            self.folders[folder_id] = self.folder(folder_id, f"Folder {index}", parent_id)
+            self.folders[parent_id]["children"].append(self.child(self.folders[folder_id]))
+            levels[level].append(folder_id)
+
+        content_folder_ids = [folder_id for level in levels for folder_id in level]
+        for index in range(searches):
+            content_id = self.content_id(0x200000 + index)
+            folder_id = content_folder_ids[index % len(content_folder_ids)]
+            self.searches[content_id] = self.search(index)
+            self.folders[folder_id]["children"].append(
+                {"id": content_id, "name": f"Search {index}", "itemType": "Search", "parentId": folder_id,
+                 "modifiedAt": "2024-01-01T00:00:00.000Z"})
+
+        for index in range(dashboards):
+            content_id = self.content_id(0x300000 + index)
+            dashboard_id = f"Dash{index:012d}"
+            folder_id = content_folder_ids[index % len(content_folder_ids)]
+            self.dashboards[dashboard_id] = self.dashboard(dashboard_id, content_id, folder_id, index, panels)
+            self.folders[folder_id]["children"].append(
+                {"id": content_id, "name": f"Dashboard {index}", "itemType": "Dashboard", "parentId": folder_id,
+                 "modifiedAt": "2024-01-01T00:00:00.000Z"})
+        self.dashboard_list = list(self.dashboards.values())
+
+    def __repr__(self):
+        return (f"MockContent(folders={len(self.folders) - 2}, dashboards={len(self.dashboards)}, "
+                f"searches={len(self.searches)})")
+
+    @staticmethod
+    def content_id(number: int) -> str:
+        return f"{number:016X}"
+
+    @staticmethod
+    def folder(folder_id: str, name: str, parent_id: str) -> Dict[str, Any]:
+        return {"id": folder_id, "name": name, "itemType": "Folder", "parentId": parent_id,
+                "description": f"{name} of the benchmark app", "modifiedAt": "2024-01-01T00:00:00.000Z",
+                "children": []}
+
+    @staticmethod
+    def child(folder: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in folder.items() if key != "children"}
+
+    @staticmethod
+    def search(index: int) -> Dict[str, Any]:
+        return {
+            "type": "SavedSearchWithScheduleSyncDefinition",
+            "name": f"Search {index}",
+            "description": f"Saved search {index} with \"quotes\"",
+            "search": {
+                "queryText": f"_sourceCategory=benchmark/{index} | parse \"status=*\" as status | count by status",
+                "defaultTimeRange": "-15m",
+                "byReceiptTime": False,
+                "viewName": "",
+                "viewStartTime": None,
+                "queryParameters": [],
+                "parsingMode": "Manual",
+            },
+            "searchSchedule": None,
+        }
+
+    @staticmethod
+    def dashboard(dashboard_id: str, content_id: str, folder_id: str, index: int, panels: int) -> Dict[str, Any]:
+        return {
+            "id": dashboard_id,
+            "contentId": content_id,
+            "folderId": folder_id,
+            "title": f"Dashboard {index}",
+            "description": f"Dashboard {index} of the benchmark app",
+            "refreshInterval": 0,
+            "theme": "Dark",
+            "timeRange": {"type": "BeginBoundedTimeRange",
+                          "from": {"type": "RelativeTimeRangeBoundary", "relativeTime": "-15m"}},
+            "panels": [{"key": f"panel{panel}", "title": f"Panel {panel}", "panelType": "SumoSearchPanel",
+                        "queries": [{"queryString": f"_sourceCategory=benchmark/{index} | count by _sourceHost",
+                                     "queryType": "Logs", "queryKey": "A"}]}
+                       for panel in range(panels)],
+            "variables": [],
+        }
+
+
+class MockSumoServer:
+    """
+    Serves `content` on `host:port` (a free port by default) from a background thread.
+
+    Every request is delayed by `latency` seconds. Content export, app upload and app delete jobs finish
+    `job_duration` seconds after they were started, dashboard reports after `report_duration` seconds. The number
+    of requests and bytes per route are counted, see `stats`.
+    """
+
+    def __init__(self, content: MockContent, latency: float = 0.0, job_duration: float = 0.5,
+                 report_duration: float = 1.0, page_size: int = DEFAULT_PAGE_SIZE,
+                 screenshot_size: Tuple[int, int] = (1200, 900), host: str = "127.0.0.1", port: int = 0,
+                 verbose: bool = False):
+        self.content = content
+        self.latency = latency
+        self.job_duration = job_duration
+        self.report_duration = report_duration
+        self.page_size = page_size
+        self.screenshot = self.render_screenshot(*screenshot_size)
+        self.verbose = verbose
+
+        self.jobs: Dict[str, float] = {}
+        self.apps: Dict[str, str] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), MockSumoRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api/"
+
+    def start(self) -> "MockSumoServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-sumo-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Requests, bytes received and bytes sent per route since the server started or `reset_stats` was called.
+        """
+        with self._lock:
+            return {route: dict(counters) for route, counters in sorted(self._stats.items())}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def record(self, route: str, bytes_in: int, bytes_out: int) -> None:
+        with self._lock:
+            counters = self._stats.setdefault(route, {"requests": 0, "bytes_in": 0, "bytes_out": 0})
+            counters["requests"] += 1
+            counters["bytes_in"] += bytes_in
+            counters["bytes_out"] += bytes_out
+
+    def start_job(self, duration: float) -> str:
+        job_id = uuid.uuid4().hex.upper()
+        with self._lock:
+            self.jobs[job_id] = time.monotonic() + duration
+        return job_id
+
+    def job_done(self, job_id: str) -> Optional[bool]:
+        """
+        None for unknown jobs.
+        """
+        with self._lock:
+            done_at = self.jobs.get(job_id)
+        return None if done_at is None else time.monotonic() >= done_at
+
+    @staticmethod
+    def render_screenshot(width: int, height: int) -> bytes:
+        """
+        A dark themed dashboard screenshot: panels in the top left, background everywhere else, so cropping has
+        something to do.
+        """
+        image = Image.new("RGBA", (width, height), SCREENSHOT_BACKGROUND_COLOR)
+        draw = ImageDraw.Draw(image)
+        panel_width, panel_height = width // 3, height // 4
+        for row in range(2):
+            for column in range(2):
+                x, y = 10 + column * (panel_width + 10), 10 + row * (panel_height + 10)
+                draw.rectangle((x, y, x + panel_width, y + panel_height), fill=(31, 41, 55, 255))
+                draw.line((x + 10, y + panel_height - 10, x + panel_width - 10, y + 20), fill=(59, 130, 246, 255),
+                          width=3)
+        output = io.BytesIO()
+        image.save(output, "PNG")
+        return output.getvalue()
+
+
+class MockSumoRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def mock(self) -> MockSumoServer:
+        return self.server.mock
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_PUT(self):
+        self.dispatch("PUT")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        if self.mock.verbose:
+            super().log_message(format, *args)
+
+    def dispatch(self, method: str) -> None:
+        url = urlsplit(self.path)
+        path = url.path[len("/api/"):] if url.path.startswith("/api/") else None
+        self.query = parse_qs(url.query)
+        self.bytes_in = 0
+        if self.mock.latency:
+            time.sleep(self.mock.latency)
+
+        for route_method, pattern, handler in COMPILED_ROUTES:
+            match = pattern.fullmatch(path) if path is not None else None
+            if route_method == method and match:
+                status, body, content_type = getattr(self, handler)(**match.groupdict())
+                self.mock.record(handler, self.bytes_in, len(body))
+                break
+        else:
+            self.read_body()
+            status, body, content_type = self.error(404, f"No route for {method} {url.path}")
+            self.mock.record("unknown", self.bytes_in, len(body))
+        self.send(status, body, content_type)
+
+    def send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        self.bytes_in += len(body)
+        return body
+
+    def discard_body(self) -> None:
+        remaining = int(self.headers.get("Content-Length") or 0)
+        while remaining > 0:
+            chunk = self.rfile.read(min(UPLOAD_READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            self.bytes_in += len(chunk)
+
+    @staticmethod
+    def json(body: Any, status: int = 200) -> Tuple[int, bytes, str]:
+        return status, json.dumps(body).encode("utf-8"), "application/json"
+
+    def error(self, status: int, message: str) -> Tuple[int, bytes, str]:
+        return self.json({"status": status, "errors": [{"code": "mock:error", "message": message}]}, status)
+
+    def get_folder(self, folder_id: str):
+        folder = self.mock.content.folders.get(folder_id)
+        if folder is None:
+            return self.error(404, f"Folder {folder_id} not found")
+        return self.json(folder)
+
+    def list_dashboards(self):
+        offset = int(self.query.get("token", ["0"])[0])
+        limit = min(int(self.query.get("limit", [str(self.mock.page_size)])[0]), self.mock.page_size)
+        dashboards = self.mock.content.dashboard_list
+        next_offset = offset + limit
+        return self.json({"dashboards": dashboards[offset:next_offset],
+                          "next": str(next_offset) if next_offset < len(dashboards) else None})
+
+    def get_dashboard(self, dashboard_id: str):
+        dashboard = self.mock.content.dashboards.get(dashboard_id)
+        if dashboard is None:
+            return self.error(404, f"Dashboard {dashboard_id} not found")
+        return self.json(dashboard)
+
+    def start_export(self, content_id: str):
+        self.read_body()
+        if content_id not in self.mock.content.searches:
+            return self.error(404, f"Content {content_id} not found")
+        return self.json({"id": self.mock.start_job(self.mock.job_duration)})
+
+    def export_result(self, content_id: str, job_id: str):
+        if not self.mock.job_done(job_id):
+            return self.error(400, f"Job {job_id} is not done")
+        return self.json(self.mock.content.searches[content_id])
+
+    def start_report(self):
+        payload = json.loads(self.read_body() or b"{}")
+        dashboard_id = payload.get("template", {}).get("id")
+        if dashboard_id not in self.mock.content.dashboards:
+            return self.error(404, f"Dashboard {dashboard_id} not found")
+        return self.json({"id": self.mock.start_job(self.mock.report_duration)})
+
+    def report_result(self, job_id: str):
+        if not self.mock.job_done(job_id):
+            return self.error(400, f"Job {job_id} is not done")
+        return 200, self.mock.screenshot, "image/png"
+
+    def job_status(self, job_id: str, content_id: Optional[str] = None):
+        done = self.mock.job_done(job_id)
+        if done is None:
+            return self.error(404, f"Job {job_id} not found")
+        return self.json({"status": "Success" if done else "InProgress", "statusMessage": None, "error": None})
+
+    def register_app(self):
+        payload = json.loads(self.read_body() or b"{}")
+        app_uuid = str(uuid.uuid4())
+        with self.mock._lock:
+            self.mock.apps[app_uuid] = payload.get("name", "")
+        return self.json({"uuid": app_uuid})
+
+    def upload_app(self, app_uuid: str):
+        self.discard_body()
+        if app_uuid not in self.mock.apps:
+            return self.error(404, f"App {app_uuid} not found")
+        return self.json({"jobId": self.mock.start_job(self.mock.job_duration)})
+
+    def delete_app(self, app_uuid: str):
+        self.read_body()
+        with self.mock._lock:
+            found = self.mock.apps.pop(app_uuid, None) is not None
+        if not found:
+            return self.error(404, f"App {app_uuid} not found")
+        return self.json({"jobId": self.mock.start_job(self.mock.job_duration)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a mock Sumo Logic API server")
+    parser.add_argument("--dashboards", type=int, default=10)
+    parser.add_argument("--searches", type=int, default=10)
+    parser.add_argument("--folders", type=int, default=3)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds every request is delayed")
+    parser.add_argument("--job-duration", type=float, default=0.5,
+                        help="Seconds until content export and app jobs are done")
+    parser.add_argument("--report-duration", type=float, default=1.0,
+                        help="Seconds until dashboard reports are done")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    content = MockContent(args.dashboards, args.searches, args.folders, args.depth)
+    server = MockSumoServer(content, latency=args.latency, job_duration=args.job_duration,
+                            report_duration=args.report_duration, page_size=args.page_size, port=args.port,
+                            verbose=args.verbose)
+    print(f"Serving {content} on {server.base_url}, the app folder is {content.app_folder_id}")
+    print(f"Set SUMO_API_BASE_URL={server.base_url} to use it")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+End-to-end benchmarks of the import, screenshot, export and test operations against the mock API server.
+
+For every app size a mock server with that many dashboards and saved searches is started, and each operation is
+timed `--repeat` times in a temporary working directory, with the content cache disabled and the fake terraformer.
+Requests aren't throttled to the API rate limit unless `--rate-limit` is given.
+The timings, the requests the server received and the settings are written to a JSON file; pass a previous result
+file as `--baseline` to compare against it.
+
+Run from the repository root:
+
+    python3 -m benchmarks.run_benchmarks --sizes 10,50,200 --latency 0.05 --repeat 3
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.app_manager import AppManager
+from app.common import (API_BASE_URL_VARIABLE, APP_PACKAGE_TEMPLATE_PATH, DEFAULT_TERRAFORMER_SHARD_SIZE,
+                        app_results_path, app_root_path, export_manifest_path)
+from app.content_cache import ContentCache
+from app.instrumentation import start_tracing, stop_tracing
+from app.state import State
+from benchmarks.fake_terraformer import STARTUP_DELAY_VARIABLE
+from benchmarks.mock_sumo_server import MockContent, MockSumoServer
+
+REPOSITORY_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_TERRAFORMER_PATH = os.path.join(REPOSITORY_PATH, "benchmarks", "fake_terraformer.py")
+DEFAULT_OUTPUT_DIR = os.path.join(REPOSITORY_PATH, "results", "benchmarks")
+
+APP_NAME = "Benchmark App"
+APP_WORK_NAME = "Benchmark-App"
+STAGES = ("import_content", "download_screenshots", "save_and_export", "save_and_export_unchanged", "test_app")
+
+
+def create_app_manager(args) -> AppManager:
+    state = State()
+    state.log_in("benchmark", "mock", "benchmark-access-key", "benchmark-access-id")
+    state.app_work_name = APP_WORK_NAME
+    return AppManager(state, FAKE_TERRAFORMER_PATH, ContentCache(enabled=False),
+                      terraformer_shard_size=args.terraformer_shard_size,
+                      terraformer_workers=args.terraformer_workers,
+                      max_requests_per_second=args.rate_limit)
+
+
+@contextlib.contextmanager
+def operation_output(verbose: bool):
+    """
+    Hide the output of the benchmarked operations unless `verbose`.
+    """
+    if verbose:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def timed(timings: Dict[str, float], stage: str, operation: Callable[[], Any], verbose: bool) -> Any:
+    with operation_output(verbose):
+        started_at = time.perf_counter()
+        result = operation()
+        timings[stage] = time.perf_counter() - started_at
+    return result
+
+
+def run_once(args, content: MockContent) -> Dict[str, float]:
+    """
+    Run every stage once and return the seconds each took.
+    """
+    timings = {}
+    app_manager = create_app_manager(args)
+    try:
+        app_manager.create_new_app_package(APP_WORK_NAME)
+        app_manager.set_app_name(APP_NAME)
+
+        timed(timings, "import_content", lambda: app_manager.import_resources(content.app_folder_id), args.verbose)
+        dashboards_tf_path = os.path.join(app_root_path(APP_WORK_NAME), "resources", "dashboards.tf")
+        with open(dashboards_tf_path, 'r', encoding='utf-8') as file:
+            imported = file.read().count('resource "sumologic_dashboard"')
+        if imported != len(content.dashboards):
+            raise RuntimeError(f"Imported {imported} of {len(content.dashboards)} dashboards")
+
+        app_content_manager = app_manager.app_content_manager
+        snapshot = app_content_manager.create_content_snapshot(content.app_folder_id)
+        screenshots = timed(timings, "download_screenshots",
+                            lambda: app_content_manager.download_screenshots(snapshot), args.verbose)
+        if len(screenshots) != len(content.dashboards):
+            raise RuntimeError(f"Took {len(screenshots)} of {len(content.dashboards)} screenshots")
+
+        for path in (app_results_path(APP_NAME) + ".zip", export_manifest_path(APP_NAME)):
+            if os.path.exists(path):
+                os.remove(path)
+        timed(timings, "save_and_export", app_manager.save_and_export, args.verbose)
+        timed(timings, "save_and_export_unchanged", app_manager.save_and_export, args.verbose)
+
+        success, message = timed(timings, "test_app", app_manager.test_app, args.verbose)
+        if not success:
+            raise RuntimeError(f"Test failed: {message}")
+    finally:
+        with operation_output(args.verbose):
+            app_manager.close()
+    return timings
+
+
+def run_size(args, dashboards: int) -> Dict[str, Any]:
+    content = MockContent(dashboards=dashboards, searches=dashboards, folders=max(1, dashboards // 10),
+                          depth=args.depth, panels=args.panels)
+    runs: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    with MockSumoServer(content, latency=args.latency, job_duration=args.job_duration,
+                        report_duration=args.report_duration, page_size=args.page_size) as server:
+        os.environ[API_BASE_URL_VARIABLE] = server.base_url
+        for repeat in range(args.repeat):
+            server.reset_stats()
+            start_tracing()
+            try:
+                timings = run_once(args, content)
+            finally:
+                tracer = stop_tracing()
+            if args.traces:
+                tracer.write(os.path.join(args.traces, f"trace-{dashboards}-{repeat + 1}.json"), "chrome")
+            for stage in STAGES:
+                runs[stage].append(round(timings[stage], 4))
+            print(f"{dashboards} dashboards, run {repeat + 1}/{args.repeat}: "
+                  + ", ".join(f"{stage} {timings[stage]:.2f}s" for stage in STAGES))
+        requests = server.stats()
+        trace_summary = tracer.summary()
+
+    return {
+        "dashboards": dashboards,
+        "searches": len(content.searches),
+        "folders": len(content.folders) - 1,
+        "timings": {stage: {"median": round(statistics.median(values), 4), "min": min(values), "runs": values}
+                    for stage, values in runs.items()},
+        "requests": requests,
+        # stages, HTTP requests, jobs and terraformer runs of the last run
+        "trace": trace_summary,
+    }
+
+
+def print_results(results: List[Dict[str, Any]], baseline: Optional[Dict[str, Any]]) -> None:
+    baseline_sizes = {result["dashboards"]: result for result in (baseline or {}).get("results", [])}
+    print(f"{'dashboards':>10}  {'stage':<26}{'median':>9}{'min':>9}")
+    for result in results:
+        for stage, timing in result["timings"].items():
+            line = f"{result['dashboards']:>10}  {stage:<26}{timing['median']:>8.3f}s{timing['min']:>8.3f}s"
+            baseline_timing = baseline_sizes.get(result["dashboards"], {}).get("timings", {}).get(stage)
+            if baseline_timing and baseline_timing["median"]:
+                line += f"  {timing['median'] / baseline_timing['median']:.2f}x baseline"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark imports and exports against the mock API server")
+    parser.add_argument("--sizes", default="10,50,200",
+                        help="Comma separated numbers of dashboards (and saved searches) of the benchmarked apps")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size, the median is reported")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds every request is delayed")
+    parser.add_argument("--job-duration", type=float, default=0.5,
+                        help="Seconds until content export and app jobs are done")
+    parser.add_argument("--report-duration", type=float, default=1.0,
+                        help="Seconds until dashboard reports are done")
+    parser.add_argument("--page-size", type=int, default=100, help="Dashboards per page")
+    parser.add_argument("--depth", type=int, default=2, help="Levels of folders below the app folder")
+    parser.add_argument("--panels", type=int, default=4, help="Panels per dashboard")
+    parser.add_argument("--terraformer-startup", type=float, default=0.5,
+                        help="Seconds every fake terraformer process takes to start")
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="Requests per second of the API client, unlimited by default so the timings measure the "
+                             "tool rather than the rate limiter (the Sumo Logic API allows 4)")
+    parser.add_argument("--terraformer-shard-size", type=int, default=DEFAULT_TERRAFORMER_SHARD_SIZE)
+    parser.add_argument("--terraformer-workers", type=int, default=None)
+    parser.add_argument("--output", help="Result file, by default a timestamped file in results/benchmarks")
+    parser.add_argument("--baseline", help="Result file of a previous run to compare with")
+    parser.add_argument("--traces", help="Directory to write a Chrome trace of every run to")
+    parser.add_argument("--keep-workspace", action="store_true", help="Keep the temporary working directory")
+    parser.add_argument("--verbose", action="store_true", help="Show the output of the benchmarked operations")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    created_at = datetime.datetime.now()
+    output_path = os.path.abspath(args.output or os.path.join(
+        DEFAULT_OUTPUT_DIR, f"benchmark-{created_at.strftime('%Y%m%d-%H%M%S')}.json"))
+    if args.traces:
+        args.traces = os.path.abspath(args.traces)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+
+    # the tool works with paths relative to the working directory
+    workspace_path = tempfile.mkdtemp(prefix="app-benchmark-")
+    shutil.copytree(os.path.join(REPOSITORY_PATH, APP_PACKAGE_TEMPLATE_PATH),
+                    os.path.join(workspace_path, APP_PACKAGE_TEMPLATE_PATH))
+    previous_environment = {name: os.environ.get(name) for name in (API_BASE_URL_VARIABLE, STARTUP_DELAY_VARIABLE)}
+    os.environ[STARTUP_DELAY_VARIABLE] = str(args.terraformer_startup)
+    previous_directory = os.getcwd()
+    os.chdir(workspace_path)
+    try:
+        results = [run_size(args, size) for size in sizes]
+    finally:
+        os.chdir(previous_directory)
+        for name, value in previous_environment.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        if args.keep_workspace:
+            print(f"Workspace kept in {workspace_path}")
+        else:
+            shutil.rmtree(workspace_path, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as file:
+        json.dump({
+            "created_at": created_at.isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "settings": {name: value for name, value in vars(args).items()
+                         if name not in ("output", "baseline", "traces", "keep_workspace", "verbose")},
+            "results": results,
+        }, file, indent=2)
+
+    print_results(results, baseline)
+    print(f"Results written to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
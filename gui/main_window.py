@@ -5,6 +5,7 @@ import os
 from tkinter import filedialog, messagebox
 
 from app.common import random_string
+from gui.task_runner import TaskRunner
 
 
 class MainWindow(tk.Tk):
@@ -12,6 +13,9 @@ class MainWindow(tk.Tk):
         super().__init__()
         self.state = state
         self.app_manager = app_manager
+        # imports, exports and tests run in the background so the window stays responsive
+        self.task_runner = TaskRunner(self, app_manager.cancel_event)
+        self.closing = False
         self.user = None
         self.user_label = tk.Label(self)
         self.user_label.grid()  # Change pack to grid
@@ -25,6 +29,8 @@ class MainWindow(tk.Tk):
 
         self.center_window()
 
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
     def initialize_main_frame(self):
         # Create the main view
         self.main_frame = tk.Frame(self)
@@ -79,6 +85,12 @@ class MainWindow(tk.Tk):
         self.resource_id_entry = tk.Entry(self.create_app_frame)
         self.resource_id_entry.grid(row=5, column=2)
 
+        # Re-import only the content that changed since the last import of the same folder
+        self.incremental_import_var = tk.BooleanVar(self.create_app_frame, value=False)
+        self.incremental_import_checkbox = tk.Checkbutton(self.create_app_frame, text="Incremental",
+                                                          variable=self.incremental_import_var)
+        self.incremental_import_checkbox.grid(row=5, column=3)
+
         # Add "Save & Export" button
         self.save_and_export_button = tk.Button(self.create_app_frame, text="Save & Export",
                                                 command=self.save_and_export, height=3, width=20)
@@ -88,6 +100,14 @@ class MainWindow(tk.Tk):
                                          state=tk.DISABLED)
         self.test_app_button.grid(row=6, column=0)
 
+        # Cancels the running import, export or test
+        self.cancel_button = tk.Button(self.create_app_frame, text="Cancel", command=self.cancel_task,
+                                       state=tk.DISABLED)
+        self.cancel_button.grid(row=7, column=0)
+
+        self.task_status_label = tk.Label(self.create_app_frame, text="")
+        self.task_status_label.grid(row=7, column=1, columnspan=3, sticky='w')
+
         # Add "Back to Main" button
         self.back_to_main_button = tk.Button(self.create_app_frame, text="Back to Main", command=self.show_main_frame)
         self.back_to_main_button.grid(row=9, column=0, sticky='nsew')
@@ -248,20 +268,80 @@ class MainWindow(tk.Tk):
             print(f"Selected file path: {file_path}")
             self.app_manager.set_icon(file_path)
 
+    def run_task(self, name, target, status, on_success=None):
+        """
+        Run `target` in the background, showing `status` until it is done.
+        """
+        def finish(text):
+            self.cancel_button['state'] = tk.DISABLED
+            self.task_status_label.config(text=text)
+
+        def succeeded(result):
+            finish("")
+            if on_success:
+                on_success(result)
+
+        def failed(error):
+            finish(f"{name} failed")
+            messagebox.showerror(name, str(error))
+
+        started = self.task_runner.run(
+            name, target,
+            on_success=succeeded,
+            on_error=failed,
+            on_cancel=lambda: finish(f"{name} cancelled"),
+            on_progress=lambda message: self.task_status_label.config(text=message),
+            widgets=[self.import_resources_button, self.resource_id_entry, self.incremental_import_checkbox,
+                     self.save_and_export_button, self.test_app_button, self.set_icon_button,
+                     self.back_to_main_button],
+        )
+        if started:
+            self.cancel_button['state'] = tk.NORMAL
+            self.task_status_label.config(text=status)
+
+    def cancel_task(self):
+        self.task_status_label.config(text="Cancelling...")
+        self.task_runner.cancel()
+
+    def close(self):
+        if self.closing:
+            return
+        self.closing = True
+        # stop the running task before the temporary folders are removed
+        if self.task_runner.running:
+            self.task_status_label.config(text="Cancelling...")
+        self.task_runner.shutdown(self.destroy)
+
     def import_resources(self):
         print("Importing resources...")
-        self.app_manager.import_resources(self.resource_id_entry.get())
-        print("Done importing resources")
+        resource_id = self.resource_id_entry.get()
+        incremental = self.incremental_import_var.get()
+        self.run_task("Import", lambda: self.app_manager.import_resources(resource_id, incremental),
+                      "Importing resources...", on_success=lambda _: print("Done importing resources"))
 
     def save_and_export(self):
-        self.app_manager.save_and_export()
-        self.test_app_button['state'] = tk.NORMAL
+        def exported(_):
+            self.test_app_button['state'] = tk.NORMAL
+
+        self.run_task("Export", self.app_manager.save_and_export, "Exporting...", on_success=exported)
 
     def test_app(self):
-        result = self.app_manager.test_app()
-        success, message = result if isinstance(result, tuple) else (False, "Unknown error")
+        last_percent = None
 
-        if success:
-            messagebox.showinfo("Test Result", message)
-        else:
-            messagebox.showerror("Test Result", message)
+        def report_upload(sent, total):
+            nonlocal last_percent
+            percent = 100 * sent // total
+            if percent != last_percent:
+                last_percent = percent
+                self.task_runner.report(f"Uploading... {percent}%")
+
+        def show_result(result):
+            success, message = result if isinstance(result, tuple) else (False, "Unknown error")
+
+            if success:
+                messagebox.showinfo("Test Result", message)
+            else:
+                messagebox.showerror("Test Result", message)
+
+        self.run_task("Test", lambda: self.app_manager.test_app(report_upload), "Testing app...",
+                      on_success=show_result)
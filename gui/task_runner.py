@@ -0,0 +1,122 @@
+import queue
+import threading
+import time
+import tkinter as tk
+from typing import Any, Callable, Iterable, Optional
+
+from app.job_poller import OperationCancelled
+
+# seconds a closing window waits for the cancelled task to stop
+DEFAULT_SHUTDOWN_TIMEOUT = 5
+
+
+class TaskRunner:
+    """
+    Runs long operations (import, export, test) on a worker thread so the Tk event loop keeps running.
+
+    Only one task runs at a time. Results, errors and progress messages are passed back through a queue that is
+    drained on the Tk thread with `after()`, so callbacks can safely update widgets. The given widgets are disabled
+    while the task runs. `cancel` sets the cancel event the operations check; a cancelled task ends with
+    `on_cancel` instead of `on_error`.
+    """
+
+    def __init__(self, root: tk.Misc, cancel_event: threading.Event, poll_interval_ms: int = 100):
+        self.root = root
+        self.cancel_event = cancel_event
+        self.poll_interval_ms = poll_interval_ms
+        self._queue = queue.Queue()
+        self._thread = None
+        self._callbacks = {}
+        self._widgets = []
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def run(self, name: str, target: Callable[[], Any], on_success: Optional[Callable[[Any], None]] = None,
+            on_error: Optional[Callable[[Exception], None]] = None, on_cancel: Optional[Callable[[], None]] = None,
+            on_progress: Optional[Callable[[str], None]] = None, widgets: Iterable[tk.Widget] = ()) -> bool:
+        """
+        Start `target` on a worker thread. Returns False if another task is still running.
+        """
+        if self.running:
+            return False
+
+        self.cancel_event.clear()
+        self._callbacks = {"success": on_success, "error": on_error, "cancel": on_cancel, "progress": on_progress}
+        self._widgets = [widget for widget in widgets if widget['state'] != tk.DISABLED]
+        for widget in self._widgets:
+            widget['state'] = tk.DISABLED
+
+        self._thread = threading.Thread(target=self._work, args=(target,), name=name, daemon=True)
+        self._thread.start()
+        self.root.after(self.poll_interval_ms, self._poll)
+        return True
+
+    def report(self, message: str) -> None:
+        """
+        Pass a progress message to the task's `on_progress` callback. Can be called from any thread.
+        """
+        self._queue.put(("progress", message))
+
+    def cancel(self) -> None:
+        if self.running:
+            self.cancel_event.set()
+
+    def shutdown(self, on_stopped: Callable[[], None], timeout: float = DEFAULT_SHUTDOWN_TIMEOUT) -> None:
+        """
+        Cancel the running task and call `on_stopped` once its thread stopped, or after `timeout` seconds if it is
+        stuck, e.g. in a request that can't be interrupted. The Tk event loop keeps running meanwhile.
+        """
+        thread = self._thread
+        if thread is None:
+            on_stopped()
+            return
+        self.cancel_event.set()
+        deadline = time.monotonic() + timeout
+
+        def check():
+            if thread.is_alive() and time.monotonic() < deadline:
+                self.root.after(self.poll_interval_ms, check)
+            else:
+                on_stopped()
+
+        check()
+
+    def _work(self, target: Callable[[], Any]) -> None:
+        try:
+            self._queue.put(("success", target()))
+        except OperationCancelled:
+            self._queue.put(("cancel", None))
+        except Exception as e:
+            if self.cancel_event.is_set():
+                # operations that were interrupted may fail in other ways than raising OperationCancelled
+                self._queue.put(("cancel", None))
+            else:
+                self._queue.put(("error", e))
+
+    def _poll(self) -> None:
+        while True:
+            try:
+                kind, value = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                self._callback("progress", value)
+                continue
+
+            self._thread = None
+            for widget in self._widgets:
+                widget['state'] = tk.NORMAL
+            self._widgets = []
+            if kind == "cancel":
+                self._callback("cancel")
+            else:
+                self._callback(kind, value)
+            return
+        self.root.after(self.poll_interval_ms, self._poll)
+
+    def _callback(self, kind: str, *args) -> None:
+        callback = self._callbacks.get(kind)
+        if callback is not None:
+            callback(*args)
@@ -1,24 +1,143 @@
 import argparse
+import sys
+import time
 
 from app.app_manager import AppManager
-from app.common import cleanup_temporary_folders
+from app.batch import (BatchEntry, BatchRunner, DEFAULT_BATCH_WORKERS, DEFAULT_DEPLOYMENT_CONCURRENCY,
+                       load_accounts, load_batch_file, write_summary)
+from app.common import (APP_PACKAGE_RESULTS_DIR, DEFAULT_MAX_CONCURRENT_REQUESTS, DEFAULT_TERRAFORMER_SHARD_SIZE,
+                        cleanup_temporary_folders)
+from app.content_cache import ContentCache
+from app.instrumentation import TRACE_FORMATS, start_tracing
+from app.packager import DEFAULT_COMPRESSION_LEVEL
 
-from gui.main_window import MainWindow
 from app.state import State
 
 
+def create_app_manager(args, state, content_cache):
+    return AppManager(state, args.terraformer_path, content_cache,
+                      terraformer_shard_size=args.terraformer_shard_size,
+                      terraformer_workers=args.terraformer_workers,
+                      compression_level=args.compression_level,
+                      max_concurrent_requests=args.max_concurrent_requests,
+                      screenshot_workers=args.screenshot_workers)
+
+
 def main(args):
+    # the GUI is only loaded when it's used, so the headless commands also run where Tk isn't available
+    from gui.main_window import MainWindow
+
     state = State()
-    app_manager = AppManager(state, args.terraformer_path)
+    content_cache = ContentCache(max_size_bytes=args.cache_size_mb * 1024 * 1024, enabled=not args.no_cache)
+    app_manager = create_app_manager(args, state, content_cache)
     window = MainWindow(state, app_manager)
     window.mainloop()
+    app_manager.close()
     cleanup_temporary_folders()
 
 
+def run_headless(args) -> int:
+    """
+    Run one of the headless commands. The work folders in tmp/ are kept, so later commands (and incremental
+    imports) can continue from them.
+    """
+    if args.command == "batch":
+        entries = load_batch_file(args.batch_file)
+        steps = [step.strip() for step in args.steps.split(",") if step.strip()]
+    else:
+        entries = [BatchEntry(getattr(args, "account", None), getattr(args, "folder_id", None), args.app_name)]
+        steps = [args.command]
+
+    content_cache = ContentCache(max_size_bytes=args.cache_size_mb * 1024 * 1024, enabled=not args.no_cache)
+    runner = BatchRunner(lambda state: create_app_manager(args, state, content_cache), load_accounts(), steps,
+                         workers=getattr(args, "workers", DEFAULT_BATCH_WORKERS),
+                         deployment_concurrency=getattr(args, "deployment_concurrency",
+                                                        DEFAULT_DEPLOYMENT_CONCURRENCY),
+                         incremental=getattr(args, "incremental", False))
+
+    started_at = time.monotonic()
+    results = runner.run(entries)
+    duration = time.monotonic() - started_at
+
+    if args.summary:
+        write_summary(args.summary, results, runner.steps, duration)
+        print(f"Summary written to {args.summary}")
+    failed = [result.entry.app_name for result in results if not result.success]
+    print(f"{len(results) - len(failed)} of {len(results)} apps succeeded in {duration:.1f}s")
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+    return 1 if failed else 0
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Your script description")
     parser.add_argument("--terraformer_path", type=str, default=None,
                         help="Path to the terraformer executable")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Don't reuse previously exported content from the local content cache")
+    parser.add_argument("--cache-size-mb", type=int, default=512,
+                        help="Maximum size of the local content cache in megabytes")
+    parser.add_argument("--terraformer-shard-size", type=int, default=DEFAULT_TERRAFORMER_SHARD_SIZE,
+                        help="Number of dashboards imported by a single terraformer process")
+    parser.add_argument("--terraformer-workers", type=int, default=None,
+                        help="Number of terraformer processes run in parallel, defaults to the number of CPUs")
+    parser.add_argument("--max-concurrent-requests", type=int, default=DEFAULT_MAX_CONCURRENT_REQUESTS,
+                        help="Number of API requests sent in parallel while crawling, exporting and downloading "
+                             "screenshots")
+    parser.add_argument("--screenshot-workers", type=int, default=None,
+                        help="Number of screenshots cropped in parallel, defaults to the number of CPUs")
+    parser.add_argument("--compression-level", type=int, default=DEFAULT_COMPRESSION_LEVEL, choices=range(0, 10),
+                        metavar="[0-9]", help="Compression level of exported app packages")
+    parser.add_argument("--trace", default=None,
+                        help="Write the timings of all stages, HTTP requests, jobs and terraformer runs to this file")
+    parser.add_argument("--trace-format", default="json", choices=TRACE_FORMATS,
+                        help="Format of the trace: a JSON summary with all events, or a Chrome trace "
+                             "(chrome://tracing, ui.perfetto.dev)")
+
+    # without a command the GUI is started
+    subparsers = parser.add_subparsers(dest="command", title="headless commands")
+
+    import_parser = subparsers.add_parser("import", help="Create an app package from a content folder")
+    import_parser.add_argument("--account", required=True, help="Name of an account saved in accounts.json")
+    import_parser.add_argument("--folder-id", required=True, help="ID of the content folder to import")
+    import_parser.add_argument("--incremental", action="store_true",
+                               help="Only import content that changed since the previous import")
+
+    export_parser = subparsers.add_parser("export", help="Export an imported app package to results/")
+
+    test_parser = subparsers.add_parser("test", help="Upload an exported app package to validate it")
+    test_parser.add_argument("--account", required=True, help="Name of an account saved in accounts.json")
+
+    for command_parser in (import_parser, export_parser, test_parser):
+        command_parser.add_argument("--app-name", required=True, help="Name of the app")
+
+    batch_parser = subparsers.add_parser("batch", help="Process the apps listed in a JSON or CSV file")
+    batch_parser.add_argument("batch_file",
+                              help="JSON list or CSV file of (account, folder_id, app_name) entries")
+    batch_parser.add_argument("--steps", default="import,export",
+                              help="Comma separated steps to run for every app: import, export, test")
+    batch_parser.add_argument("--workers", type=int, default=DEFAULT_BATCH_WORKERS,
+                              help="Number of apps processed in parallel")
+    batch_parser.add_argument("--deployment-concurrency", type=int, default=DEFAULT_DEPLOYMENT_CONCURRENCY,
+                              help="Number of apps of the same deployment processed in parallel")
+    batch_parser.add_argument("--incremental", action="store_true",
+                              help="Only import content that changed since the previous run")
+
+    for command_parser in (import_parser, export_parser, test_parser, batch_parser):
+        command_parser.add_argument("--summary", default=None,
+                                    help="Write a JSON summary with the outcome and timing of every app")
+    batch_parser.set_defaults(summary=f"{APP_PACKAGE_RESULTS_DIR}/batch-summary.json")
 
     args = parser.parse_args()
-    main(args)
+    tracer = start_tracing() if args.trace else None
+    exit_code = 0
+    try:
+        if args.command:
+            exit_code = run_headless(args)
+        else:
+            main(args)
+    finally:
+        if tracer is not None:
+            tracer.write(args.trace, args.trace_format)
+            print(f"Trace written to {args.trace}")
+    sys.exit(exit_code)
@@ -0,0 +1,70 @@
+import os
+
+from app.content_cache import ContentCache
+
+
+def entry_path(cache, namespace, content_id, version):
+    return cache._entry_path(namespace, content_id, version)
+
+
+def test_entries_are_keyed_by_content_id_and_version(tmp_path):
+    cache = ContentCache(str(tmp_path / "cache"))
+    cache.put_json("searches", "S1", "100", {"name": "Errors"})
+
+    assert cache.get_json("searches", "S1", "100") == {"name": "Errors"}
+    assert cache.get_json("searches", "S1", "101") is None
+    assert cache.get_json("searches", "S2", "100") is None
+    assert cache.get_json("dashboards", "S1", "100") is None
+
+
+def test_items_without_a_version_are_not_cached(tmp_path):
+    cache = ContentCache(str(tmp_path / "cache"))
+    cache.put_json("searches", "S1", None, {"name": "Errors"})
+
+    assert cache.get_json("searches", "S1", None) is None
+    assert not (tmp_path / "cache").exists()
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = ContentCache(str(tmp_path / "cache"), enabled=False)
+    cache.put_json("searches", "S1", "100", {"name": "Errors"})
+
+    assert cache.get_json("searches", "S1", "100") is None
+    assert not (tmp_path / "cache").exists()
+
+
+def test_files(tmp_path):
+    cache = ContentCache(str(tmp_path / "cache"))
+    source = tmp_path / "screenshot.png"
+    source.write_bytes(b"png")
+    cache.put_file("screenshots", "D1", "100", str(source))
+
+    target = tmp_path / "copy.png"
+    assert cache.get_file("screenshots", "D1", "100", str(target))
+    assert target.read_bytes() == b"png"
+    assert not cache.get_file("screenshots", "D1", "101", str(tmp_path / "other.png"))
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ContentCache(str(tmp_path / "cache"), max_size_bytes=350)
+    for index, content_id in enumerate(["A", "B", "C"]):
+        # 100 bytes per entry
+        cache.put_json("searches", content_id, "1", "x" * 98)
+        # distinct access times, oldest first
+        os.utime(entry_path(cache, "searches", content_id, "1"), (1000 + index, 1000 + index))
+
+    # reading A makes B the least recently used entry
+    assert cache.get_json("searches", "A", "1") is not None
+    cache.put_json("searches", "D", "1", "x" * 98)
+
+    assert cache.get_json("searches", "B", "1") is None
+    for content_id in ["A", "C", "D"]:
+        assert cache.get_json("searches", content_id, "1") is not None
+
+
+def test_clear(tmp_path):
+    cache = ContentCache(str(tmp_path / "cache"))
+    cache.put_json("searches", "S1", "100", {"name": "Errors"})
+    cache.clear()
+
+    assert cache.get_json("searches", "S1", "100") is None
@@ -0,0 +1,24 @@
+from app.app_content_manager import AppContentManager
+from app.common import API_BASE_URL_VARIABLE
+from app.content_cache import ContentCache
+from app.state import State
+from benchmarks.mock_sumo_server import MockContent, MockSumoServer
+
+
+def test_exporting_many_searches_under_the_rate_limit(tmp_path, monkeypatch):
+    # Every export takes three requests, so at 4 requests per second the last export jobs are only polled long
+    # after their 30 second timeout would have passed if it counted from their submission. This takes over a minute.
+    content = MockContent(dashboards=1, searches=100, folders=2, depth=1, panels=1)
+    monkeypatch.chdir(tmp_path)
+    with MockSumoServer(content, job_duration=3) as server:
+        monkeypatch.setenv(API_BASE_URL_VARIABLE, server.base_url)
+        state = State()
+        state.log_in("test", "mock", "test-access-key", "test-access-id")
+        manager = AppContentManager(state, None, content_cache=ContentCache(enabled=False))
+        try:
+            search_jsons = manager.export_saved_searches(list(content.searches))
+        finally:
+            manager.api_client.close()
+
+        assert set(search_jsons) == set(content.searches)
+        assert server.stats()["export_result"]["requests"] == len(content.searches)
@@ -0,0 +1,55 @@
+from app.folder_index import FolderIndex
+
+
+def folder(name):
+    return {"name": name}
+
+
+def test_app_folder_is_the_integration_folder():
+    index = FolderIndex({"A": folder("My App")}, "A")
+
+    assert index.is_root("A")
+    assert index.name("A") == "integration"
+    assert index.reference("A") == "sumologic_folder.integration_folder.id"
+
+
+def test_folders_are_named_after_their_slug():
+    index = FolderIndex({"A": folder("My App"), "B": folder("Error Logs")}, "A")
+
+    assert index.name("B") == "error_logs"
+    assert index.resource_name("B") == "error_logs_folder"
+    assert index.reference("B") == "sumologic_folder.error_logs_folder.id"
+
+
+def test_colliding_names_get_a_numeric_suffix():
+    folders = {
+        "A": folder("My App"),
+        "B": folder("Logs"),
+        "C": folder("logs"),
+        "D": folder("Logs!"),
+        "E": folder("Integration"),
+    }
+    index = FolderIndex(folders, "A")
+
+    assert [index.name(folder_id) for folder_id in "BCDE"] == ["logs", "logs_2", "logs_3", "integration_2"]
+
+
+def test_names_not_starting_with_a_letter_get_a_prefix():
+    index = FolderIndex({"A": folder("My App"), "B": folder("2024 Reports"), "C": folder("!!!")}, "A")
+
+    assert index.name("B") == "folder_2024_reports"
+    assert index.name("C") == "folder"
+
+
+def test_prefixed_names_still_get_a_suffix_on_collision():
+    index = FolderIndex({"A": folder("My App"), "B": folder("1"), "C": folder("1")}, "A")
+
+    assert index.name("B") == "folder_1"
+    assert index.name("C") == "folder_1_2"
+
+
+def test_unknown_folders():
+    index = FolderIndex({"A": folder("My App")}, "A")
+
+    assert "A" in index
+    assert "B" not in index
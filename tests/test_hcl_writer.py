@@ -0,0 +1,85 @@
+import io
+
+from app.hcl_writer import HclWriter, LazyFile, hcl_bool, hcl_string
+from app.resource_registry import ResourceRegistry
+
+
+def test_hcl_string_escapes_quotes_backslashes_and_control_characters():
+    assert hcl_string('say "hi"') == '"say \\"hi\\""'
+    assert hcl_string("C:\\logs") == '"C:\\\\logs"'
+    assert hcl_string("a\nb\r\tc") == '"a\\nb\\r\\tc"'
+
+
+def test_hcl_string_escapes_template_sequences():
+    assert hcl_string("${var.name}") == '"$${var.name}"'
+    assert hcl_string("%{ if true }") == '"%%{ if true }"'
+    # a lone dollar or percent sign is no template sequence
+    assert hcl_string("100% $5") == '"100% $5"'
+
+
+def test_hcl_string_converts_values_to_text():
+    assert hcl_string(15) == '"15"'
+    assert hcl_bool(1) == "true"
+    assert hcl_bool(None) == "false"
+
+
+def test_writer_aligns_attributes_and_escapes_labels():
+    file = io.StringIO()
+    writer = HclWriter(file)
+    with writer.block("resource", "sumologic_folder", 'odd "name"'):
+        writer.attribute("name", "var.integration_name")
+        writer.string("description", "Line 1\nLine 2")
+        with writer.block("nested"):
+            writer.attribute("enabled", hcl_bool(True))
+
+    assert file.getvalue() == (
+        'resource "sumologic_folder" "odd \\"name\\"" {\n'
+        '  name        = var.integration_name\n'
+        '  description = "Line 1\\nLine 2"\n'
+        '  nested {\n'
+        '    enabled = true\n'
+        '  }\n'
+        '}\n'
+    )
+
+
+def test_writer_lists():
+    file = io.StringIO()
+    writer = HclWriter(file)
+    with writer.list_attribute("items"):
+        writer.object_item(id='"1"', name="var.name")
+        writer.string_item('quoted "item"')
+
+    assert file.getvalue() == (
+        'items = [\n'
+        '  {\n'
+        '    "id"   = "1",\n'
+        '    "name" = var.name,\n'
+        '  },\n'
+        '  "quoted \\"item\\"",\n'
+        ']\n'
+    )
+
+
+def test_writer_registers_resources():
+    registry = ResourceRegistry()
+    writer = HclWriter(io.StringIO(), registry)
+    with writer.block("resource", "sumologic_folder", "integration_folder"):
+        pass
+    with writer.block("variable", "integration_name"):
+        pass
+
+    assert list(registry.names("sumologic_folder")) == ["integration_folder"]
+
+
+def test_lazy_file_is_only_created_when_written(tmp_path):
+    empty_path = tmp_path / "empty.tf"
+    with LazyFile(str(empty_path)) as file:
+        pass
+    assert not file.created
+    assert not empty_path.exists()
+
+    path = tmp_path / "written.tf"
+    with LazyFile(str(path)) as file:
+        file.write("locals {}\n")
+    assert path.read_text() == "locals {}\n"
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from app.job_poller import Job, JobPoller, OperationCancelled
+
+
+class Response:
+    def __init__(self, status, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._status = status
+
+    def json(self):
+        return {"status": self._status, "error": {"message": "broken"}}
+
+
+def statuses(*responses, delay=0.0):
+    """
+    Status callback returning `responses` one after another, the last one for good, each after `delay` seconds.
+    """
+    remaining = list(responses)
+
+    def get_status():
+        time.sleep(delay)
+        return remaining.pop(0) if len(remaining) > 1 else remaining[0]
+
+    return get_status
+
+
+def poller(**kwargs):
+    return JobPoller(initial_delay=0.01, max_delay=0.02, jitter=0, **kwargs)
+
+
+def test_jobs_finish_with_their_status():
+    succeeded = Job("a", statuses(Response("InProgress"), Response("Success")))
+    failed = Job("b", statuses(Response("Failed")))
+
+    poller().wait_all([succeeded, failed])
+
+    assert (succeeded.success, succeeded.message, succeeded.polls) == (True, "success", 2)
+    assert (failed.success, failed.message) == (False, "broken")
+
+
+def test_throttled_polls_are_retried():
+    job = Job("a", statuses(Response(None, 429, {"Retry-After": "0"}), Response("Success")))
+
+    poller().wait_all([job])
+
+    assert job.success
+    assert job.polls == 2
+
+
+def test_unfinished_job_times_out():
+    job = Job("a", statuses(Response("InProgress")), timeout=0.05)
+
+    poller().wait_all([job])
+
+    assert str(job.error) == "Job timed out."
+    assert job.polls > 1
+
+
+def test_time_before_the_first_poll_does_not_count():
+    # e.g. waiting behind the rate limit of the API client
+    job = Job("a", statuses(Response("Success"), delay=0.2), timeout=0.1)
+
+    poller().wait_all([job])
+
+    assert job.success
+
+
+def test_job_is_polled_again_after_its_deadline():
+    job = Job("a", statuses(Response("InProgress"), Response("Success"), delay=0.1), timeout=0.05)
+
+    poller().wait_all([job])
+
+    assert job.success
+    assert job.polls == 2
+
+
+def test_jobs_are_yielded_as_they_complete():
+    slow = Job("slow", statuses(Response("InProgress"), Response("InProgress"), Response("Success")))
+    fast = Job("fast", statuses(Response("Success")))
+
+    assert [job.key for job in poller().as_completed([slow, fast])] == ["fast", "slow"]
+
+
+def test_cancelled_polling():
+    cancel_event = threading.Event()
+    cancel_event.set()
+
+    with pytest.raises(OperationCancelled):
+        poller(cancel_event=cancel_event).wait_all([Job("a", statuses(Response("InProgress")))])
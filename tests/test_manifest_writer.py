@@ -0,0 +1,103 @@
+import pytest
+import yaml
+
+from app.manifest_writer import ManifestMediaWriter, write_manifest_name, yaml_quote
+
+MANIFEST = """\
+# comment that is kept
+name: "MyAppName"
+appMedia:
+  - title: "Overview"
+    description: "Existing screenshot"
+    type: "image"
+    location: "./assets/images/preview/Overview.png"
+  - title: "Video"
+    description: "Kept as it is"
+    type: "video"
+    location: "http://location2.example.com"
+
+# trailing section
+version: "1.0.0"
+"""
+
+
+@pytest.fixture
+def manifest_path(tmp_path):
+    (tmp_path / "assets" / "images" / "preview").mkdir(parents=True)
+    path = tmp_path / "manifest.yaml"
+    path.write_text(MANIFEST, encoding="utf-8")
+    return path
+
+
+def image_path(manifest_path, name):
+    return str(manifest_path.parent / "assets" / "images" / "preview" / name)
+
+
+def test_yaml_quote_round_trips_special_characters():
+    for value in ['say "hi"', "C:\\path", "a: b # c", "line 1\nline 2", "ünïcode", "", "- item"]:
+        assert yaml.safe_load(f"key: {yaml_quote(value)}")["key"] == value
+    assert yaml_quote(None) == '""'
+
+
+def test_entries_are_added_and_existing_ones_replaced(manifest_path):
+    writer = ManifestMediaWriter(str(manifest_path))
+    writer.add_image("Overview", 'New "quoted" description', image_path(manifest_path, "Overview.png"))
+    writer.add_image("Errors: 5xx", None, image_path(manifest_path, "Errors.png"))
+    writer.write()
+
+    content = manifest_path.read_text(encoding="utf-8")
+    manifest = yaml.safe_load(content)
+    assert manifest["appMedia"] == [
+        {"title": "Video", "description": "Kept as it is", "type": "video",
+         "location": "http://location2.example.com"},
+        {"title": "Overview", "description": 'New "quoted" description', "type": "image",
+         "location": "./assets/images/preview/Overview.png"},
+        {"title": "Errors: 5xx", "description": "", "type": "image",
+         "location": "./assets/images/preview/Errors.png"},
+    ]
+    assert content.startswith("# comment that is kept\n")
+    assert "# trailing section\n" in content
+    assert manifest["version"] == "1.0.0"
+
+
+def test_repeated_writes_dont_duplicate_entries(manifest_path):
+    for _ in range(2):
+        writer = ManifestMediaWriter(str(manifest_path))
+        writer.add_image("Errors", None, image_path(manifest_path, "Errors.png"))
+        writer.write()
+
+    locations = [media["location"] for media in yaml.safe_load(manifest_path.read_text())["appMedia"]]
+    assert locations.count("./assets/images/preview/Errors.png") == 1
+
+
+def test_removed_images_are_dropped(manifest_path):
+    writer = ManifestMediaWriter(str(manifest_path))
+    writer.remove_image(image_path(manifest_path, "Overview.png"))
+    writer.write()
+
+    locations = [media["location"] for media in yaml.safe_load(manifest_path.read_text())["appMedia"]]
+    assert locations == ["http://location2.example.com"]
+
+
+def test_nothing_to_write_leaves_the_file_alone(manifest_path):
+    ManifestMediaWriter(str(manifest_path)).write()
+
+    assert manifest_path.read_text(encoding="utf-8") == MANIFEST
+
+
+def test_manifest_without_app_media(tmp_path):
+    path = tmp_path / "manifest.yaml"
+    path.write_text('name: "MyAppName"\n')
+    writer = ManifestMediaWriter(str(path))
+    writer.add_image("Overview", None, str(tmp_path / "Overview.png"))
+
+    with pytest.raises(ValueError):
+        writer.write()
+
+
+def test_write_manifest_name(manifest_path):
+    write_manifest_name(str(manifest_path), 'My "Special" App')
+
+    manifest = yaml.safe_load(manifest_path.read_text(encoding="utf-8"))
+    assert manifest["name"] == 'My "Special" App'
+    assert len(manifest["appMedia"]) == 2
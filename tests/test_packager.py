@@ -0,0 +1,110 @@
+import os
+import zipfile
+
+import pytest
+
+from app.packager import Packager
+
+
+def create_app_folder(root):
+    app_path = root / "My-App"
+    (app_path / "resources").mkdir(parents=True)
+    (app_path / "assets" / "images").mkdir(parents=True)
+    (app_path / "manifest.yaml").write_text("name: My App\n")
+    (app_path / "resources" / "folders.tf").write_text('resource "sumologic_folder" "integration_folder" {}\n' * 50)
+    (app_path / "assets" / "images" / "overview.png").write_bytes(bytes(range(256)) * 20)
+    return app_path
+
+
+def touch(path, seconds):
+    # a distinct modification time, so the packager notices the file even within one clock tick
+    os.utime(path, ns=(seconds * 10 ** 9, seconds * 10 ** 9))
+
+
+def archive_contents(zip_path):
+    with zipfile.ZipFile(zip_path) as archive:
+        return {info.filename: archive.read(info) for info in archive.infolist()}
+
+
+def test_archive_layout(tmp_path):
+    app_path = create_app_folder(tmp_path)
+    zip_path = tmp_path / "out" / "My App.zip"
+
+    result = Packager().pack(str(app_path), str(zip_path))
+
+    assert result.rebuilt
+    with zipfile.ZipFile(zip_path) as archive:
+        names = archive.namelist()
+        assert names == sorted(names)
+        assert names[0] == "My-App/"
+        assert archive.getinfo("My-App/assets/images/overview.png").compress_type == zipfile.ZIP_STORED
+        assert archive.getinfo("My-App/resources/folders.tf").compress_type == zipfile.ZIP_DEFLATED
+        assert archive.testzip() is None
+
+
+def test_packing_the_same_files_gives_identical_archives(tmp_path):
+    app_path = create_app_folder(tmp_path)
+    first_path = tmp_path / "first.zip"
+    second_path = tmp_path / "second.zip"
+
+    Packager().pack(str(app_path), str(first_path))
+    # neither the modification times nor the order files were created in end up in the archive
+    for path in app_path.rglob("*"):
+        touch(path, 1700000000)
+    Packager().pack(str(app_path), str(second_path))
+
+    assert first_path.read_bytes() == second_path.read_bytes()
+
+
+def test_unchanged_folder_leaves_the_archive_untouched(tmp_path):
+    app_path = create_app_folder(tmp_path)
+    zip_path = tmp_path / "My App.zip"
+    manifest_path = tmp_path / "My App.zip.manifest.json"
+    packager = Packager()
+
+    packager.pack(str(app_path), str(zip_path), str(manifest_path))
+    modified_at = os.stat(zip_path).st_mtime_ns
+    result = packager.pack(str(app_path), str(zip_path), str(manifest_path))
+
+    assert not result.rebuilt
+    assert os.stat(zip_path).st_mtime_ns == modified_at
+
+
+def test_partial_rebuild_equals_full_rebuild(tmp_path):
+    app_path = create_app_folder(tmp_path)
+    zip_path = tmp_path / "My App.zip"
+    manifest_path = tmp_path / "My App.zip.manifest.json"
+    packager = Packager()
+    packager.pack(str(app_path), str(zip_path), str(manifest_path))
+
+    manifest = app_path / "manifest.yaml"
+    manifest.write_text("name: My Renamed App\n")
+    touch(manifest, 1700000000)
+    (app_path / "resources" / "dashboards.tf").write_text('resource "sumologic_dashboard" "overview" {}\n')
+    result = packager.pack(str(app_path), str(zip_path), str(manifest_path))
+
+    assert result.rebuilt
+    assert (result.copied, result.compressed) == (2, 2)
+    full_path = tmp_path / "full.zip"
+    packager.pack(str(app_path), str(full_path))
+    assert zip_path.read_bytes() == full_path.read_bytes()
+    assert archive_contents(zip_path)["My-App/manifest.yaml"] == b"name: My Renamed App\n"
+
+
+def test_removed_files_are_dropped(tmp_path):
+    app_path = create_app_folder(tmp_path)
+    zip_path = tmp_path / "My App.zip"
+    manifest_path = tmp_path / "My App.zip.manifest.json"
+    packager = Packager()
+    packager.pack(str(app_path), str(zip_path), str(manifest_path))
+
+    (app_path / "assets" / "images" / "overview.png").unlink()
+    result = packager.pack(str(app_path), str(zip_path), str(manifest_path))
+
+    assert result.rebuilt
+    assert "My-App/assets/images/overview.png" not in archive_contents(zip_path)
+
+
+def test_missing_folder(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        Packager().pack(str(tmp_path / "missing"), str(tmp_path / "missing.zip"))